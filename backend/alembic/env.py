@@ -1,17 +1,27 @@
 from __future__ import annotations
 
+import os
 import sys
 from logging.config import fileConfig
 from pathlib import Path
 
 from alembic import context
+from sqlalchemy import inspect
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
 
-if config.config_file_name is not None:
-    fileConfig(config.config_file_name)
+# Callers that already configured logging (tests, the application itself)
+# can opt out of re-reading the INI on every run, either programmatically via
+# ``Config.attributes["configure_logger"] = False`` or with
+# ``ALEMBIC_SKIP_LOGGING=1``.
+_configure_logger = config.attributes.get("configure_logger", True) and (
+    os.getenv("ALEMBIC_SKIP_LOGGING", "").lower() not in {"1", "true", "yes"}
+)
+
+if config.config_file_name is not None and _configure_logger:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 if str(BASE_DIR) not in sys.path:
@@ -19,13 +29,13 @@ if str(BASE_DIR) not in sys.path:
 
 from app.database import Base, engine as app_engine  # noqa: E402
 
-config.set_main_option("sqlalchemy.url", str(app_engine.url))
-
 target_metadata = Base.metadata
 
 
 def run_migrations_offline() -> None:
-    url = config.get_main_option("sqlalchemy.url")
+    # Online runs reuse the application engine directly; only offline SQL
+    # generation needs the URL rendered as a string.
+    url = app_engine.url.render_as_string(hide_password=False)
     context.configure(
         url=url,
         target_metadata=target_metadata,
@@ -40,16 +50,26 @@ def run_migrations_offline() -> None:
 def run_migrations_online() -> None:
     connectable = app_engine
 
+    # Set by app.utils.migration_runner to surface per-revision progress.
+    on_version_apply = config.attributes.get("on_version_apply")
+
     with connectable.connect() as connection:
         context.configure(
             connection=connection,
             target_metadata=target_metadata,
             compare_type=True,
             render_as_batch=connection.dialect.name == "sqlite",
+            on_version_apply=(on_version_apply,) if on_version_apply else (),
         )
-
-        with context.begin_transaction():
-            context.run_migrations()
+        # One Inspector for the whole revision chain; the migration helpers
+        # clear its cache after each DDL statement they issue.
+        config.attributes["inspector"] = inspect(connection)
+
+        try:
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            config.attributes.pop("inspector", None)
 
 
 if context.is_offline_mode():
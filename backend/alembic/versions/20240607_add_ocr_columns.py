@@ -1,8 +1,8 @@
 """Add OCR configuration columns to template_fields"""
 
-from alembic import op
 import sqlalchemy as sa
-from sqlalchemy import inspect
+
+from app.utils.migration_helpers import add_columns, drop_column, existing_columns
 
 
 # revision identifiers, used by Alembic.
@@ -18,24 +18,23 @@ ROI_COLUMN = "ocr_roi"
 
 
 def upgrade() -> None:
-    bind = op.get_bind()
-    inspector = inspect(bind)
-    existing_columns = {column["name"] for column in inspector.get_columns(TABLE_NAME)}
+    columns = existing_columns(TABLE_NAME)
+    new_columns = []
+
+    if PSM_COLUMN not in columns:
+        new_columns.append(sa.Column(PSM_COLUMN, sa.Integer(), nullable=True))
 
-    if PSM_COLUMN not in existing_columns:
-        op.add_column(TABLE_NAME, sa.Column(PSM_COLUMN, sa.Integer(), nullable=True))
+    if ROI_COLUMN not in columns:
+        new_columns.append(sa.Column(ROI_COLUMN, sa.Text(), nullable=True))
 
-    if ROI_COLUMN not in existing_columns:
-        op.add_column(TABLE_NAME, sa.Column(ROI_COLUMN, sa.Text(), nullable=True))
+    add_columns(TABLE_NAME, new_columns)
 
 
 def downgrade() -> None:
-    bind = op.get_bind()
-    inspector = inspect(bind)
-    existing_columns = {column["name"] for column in inspector.get_columns(TABLE_NAME)}
+    columns = existing_columns(TABLE_NAME)
 
-    if ROI_COLUMN in existing_columns:
-        op.drop_column(TABLE_NAME, ROI_COLUMN)
+    if ROI_COLUMN in columns:
+        drop_column(TABLE_NAME, ROI_COLUMN)
 
-    if PSM_COLUMN in existing_columns:
-        op.drop_column(TABLE_NAME, PSM_COLUMN)
+    if PSM_COLUMN in columns:
+        drop_column(TABLE_NAME, PSM_COLUMN)
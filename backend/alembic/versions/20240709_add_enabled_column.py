@@ -1,8 +1,8 @@
 """Add enabled column to template_fields"""
 
-from alembic import op
 import sqlalchemy as sa
-from sqlalchemy import inspect
+
+from app.utils.migration_helpers import add_column, drop_column, existing_columns
 
 
 # revision identifiers, used by Alembic.
@@ -17,21 +17,13 @@ COLUMN_NAME = "enabled"
 
 
 def upgrade() -> None:
-    bind = op.get_bind()
-    inspector = inspect(bind)
-    existing_columns = {column["name"] for column in inspector.get_columns(TABLE_NAME)}
-
-    if COLUMN_NAME not in existing_columns:
-        op.add_column(
+    if COLUMN_NAME not in existing_columns(TABLE_NAME):
+        add_column(
             TABLE_NAME,
             sa.Column(COLUMN_NAME, sa.Boolean(), nullable=True, server_default="1"),
         )
 
 
 def downgrade() -> None:
-    bind = op.get_bind()
-    inspector = inspect(bind)
-    existing_columns = {column["name"] for column in inspector.get_columns(TABLE_NAME)}
-
-    if COLUMN_NAME in existing_columns:
-        op.drop_column(TABLE_NAME, COLUMN_NAME)
+    if COLUMN_NAME in existing_columns(TABLE_NAME):
+        drop_column(TABLE_NAME, COLUMN_NAME)
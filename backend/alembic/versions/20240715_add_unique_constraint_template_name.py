@@ -7,8 +7,15 @@ Create Date: 2024-07-15 00:00:00.000000
 """
 
 from alembic import op
+import sqlalchemy as sa
 from sqlalchemy import text
 
+from app.utils.migration_helpers import (
+    existing_unique_constraints,
+    report_progress,
+    reset_reflection_cache,
+)
+
 
 # revision identifiers, used by Alembic.
 revision = "32f8eac34adf"
@@ -19,6 +26,10 @@ depends_on = None
 
 TABLE_NAME = "templates"
 CONSTRAINT_NAME = "uq_templates_name"
+UPDATE_CHUNK_SIZE = 500
+SCAN_BATCH_SIZE = 1000
+# Dialects that can rename duplicates with a single server-side UPDATE.
+SERVER_SIDE_DEDUP_DIALECTS = {"sqlite", "postgresql"}
 
 
 def _normalize(value: str) -> str:
@@ -27,40 +38,144 @@ def _normalize(value: str) -> str:
     return str(value).strip().lower()
 
 
+def _rename_templates(bind, renames: list[tuple[int, str]]) -> None:
+    """Apply ``(row_id, new_name)`` pairs with one UPDATE per chunk."""
+
+    for start in range(0, len(renames), UPDATE_CHUNK_SIZE):
+        chunk = renames[start:start + UPDATE_CHUNK_SIZE]
+        params = {}
+        for index, (row_id, new_name) in enumerate(chunk):
+            params[f"id{index}"] = row_id
+            params[f"name{index}"] = new_name
+
+        cases = " ".join(
+            f"WHEN :id{index} THEN :name{index}" for index in range(len(chunk))
+        )
+        ids = ", ".join(f":id{index}" for index in range(len(chunk)))
+        bind.execute(
+            text(
+                f"UPDATE {TABLE_NAME} SET name = CASE id {cases} END "
+                f"WHERE id IN ({ids})"
+            ),
+            params,
+        )
+
+
+def _rename_duplicates_in_database(bind) -> None:
+    """Suffix every duplicate name except the lowest id without leaving the DB."""
+
+    result = bind.execute(
+        text(
+            f"UPDATE {TABLE_NAME} "
+            "SET name = name || '_' || CAST(id AS VARCHAR(20)) "
+            "WHERE id IN ("
+            f"SELECT t.id FROM {TABLE_NAME} AS t "
+            "JOIN ("
+            "SELECT LOWER(TRIM(name)) AS normalized, MIN(id) AS keep_id "
+            f"FROM {TABLE_NAME} "
+            "WHERE TRIM(name) <> '' "
+            "GROUP BY LOWER(TRIM(name)) "
+            "HAVING COUNT(*) > 1"
+            ") AS duplicates "
+            "ON LOWER(TRIM(t.name)) = duplicates.normalized "
+            "AND t.id <> duplicates.keep_id"
+            ")"
+        )
+    )
+    report_progress(revision, max(result.rowcount, 0))
+
+
+def _rename_duplicates_in_python(bind) -> None:
+    """Portable fallback that normalizes names client-side.
+
+    Pages through the table by primary key so every statement only touches a
+    bounded slice of rows, and the lowest id of each name is the one kept.
+    """
+
+    page_query = text(
+        f"SELECT id, name FROM {TABLE_NAME} "
+        "WHERE id > :last_id ORDER BY id LIMIT :limit"
+    )
+    seen: set[str] = set()
+    renames: list[tuple[int, str]] = []
+    scanned = 0
+    last_id = 0
+
+    while True:
+        rows = bind.execute(
+            page_query, {"last_id": last_id, "limit": SCAN_BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+
+        for row_id, row_name in rows:
+            normalized = _normalize(row_name)
+
+            if not normalized:
+                continue
+
+            if normalized in seen:
+                new_name = (
+                    f"{row_name}_{row_id}" if row_name else f"template_{row_id}"
+                )
+                renames.append((row_id, new_name))
+            else:
+                seen.add(normalized)
+
+        scanned += len(rows)
+        last_id = rows[-1][0]
+
+        if len(renames) >= UPDATE_CHUNK_SIZE:
+            _rename_templates(bind, renames)
+            renames.clear()
+            report_progress(revision, scanned)
+
+    _rename_templates(bind, renames)
+    report_progress(revision, scanned)
+
+
+def _sqlite_batch(bind):
+    """Batch context that reuses one reflection of the table for the copy."""
+
+    table = sa.Table(TABLE_NAME, sa.MetaData(), autoload_with=bind)
+    return op.batch_alter_table(TABLE_NAME, copy_from=table)
+
+
 def upgrade() -> None:
+    # Databases created from the initial schema already carry the
+    # constraint; skip the dedup scan and, on SQLite, the table rebuild.
+    if CONSTRAINT_NAME in existing_unique_constraints(TABLE_NAME):
+        return
+
     bind = op.get_bind()
 
-    result = bind.execute(text(f"SELECT id, name FROM {TABLE_NAME}"))
-    rows = result.fetchall()
-    seen = {}
+    if bind.dialect.name in SERVER_SIDE_DEDUP_DIALECTS:
+        _rename_duplicates_in_database(bind)
+    else:
+        # Stays inside the migration transaction: env.py runs the whole
+        # revision chain in one transaction, and committing here would also
+        # commit every earlier revision before the unique constraint exists.
+        _rename_duplicates_in_python(bind)
 
-    for row in rows:
-        mapping = row._mapping
-        row_id = mapping["id"]
-        row_name = mapping.get("name")
+    if bind.dialect.name == "sqlite":
+        with _sqlite_batch(bind) as batch_op:
+            batch_op.create_unique_constraint(CONSTRAINT_NAME, ["name"])
+    else:
+        op.create_unique_constraint(CONSTRAINT_NAME, TABLE_NAME, ["name"])
 
-        normalized = _normalize(row_name)
+    reset_reflection_cache(TABLE_NAME)
 
-        if not normalized:
-            continue
 
-        if normalized in seen:
-            new_name = (
-                f"{row_name}_{row_id}" if row_name else f"template_{row_id}"
-            )
-            bind.execute(
-                text(
-                    f"UPDATE {TABLE_NAME} SET name = :new_name WHERE id = :template_id"
-                ),
-                {"new_name": new_name, "template_id": row_id},
-            )
-        else:
-            seen[normalized] = row_id
+def downgrade() -> None:
+    if CONSTRAINT_NAME not in existing_unique_constraints(TABLE_NAME):
+        return
 
-    with op.batch_alter_table(TABLE_NAME) as batch_op:
-        batch_op.create_unique_constraint(CONSTRAINT_NAME, ["name"])
+    bind = op.get_bind()
 
+    if bind.dialect.name == "sqlite":
+        with _sqlite_batch(bind) as batch_op:
+            batch_op.drop_constraint(CONSTRAINT_NAME, type_="unique")
+    else:
+        op.drop_constraint(CONSTRAINT_NAME, TABLE_NAME, type_="unique")
 
-def downgrade() -> None:
-    with op.batch_alter_table(TABLE_NAME) as batch_op:
-        batch_op.drop_constraint(CONSTRAINT_NAME, type_="unique")
+    reset_reflection_cache(TABLE_NAME)
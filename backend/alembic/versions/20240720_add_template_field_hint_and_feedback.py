@@ -1,8 +1,16 @@
 """Add template field hint and correction feedback tables."""
 
-from alembic import op
 import sqlalchemy as sa
-from sqlalchemy import inspect
+
+from app.utils.migration_helpers import (
+    add_columns,
+    create_table,
+    drop_column,
+    drop_index,
+    drop_table,
+    existing_columns,
+    existing_tables,
+)
 
 
 # revision identifiers, used by Alembic.
@@ -12,48 +20,36 @@ branch_labels = None
 depends_on = None
 
 
-def _existing_columns(table_name: str) -> set[str]:
-    bind = op.get_bind()
-    inspector = inspect(bind)
-    return {column["name"] for column in inspector.get_columns(table_name)}
-
-
-def _existing_tables() -> set[str]:
-    bind = op.get_bind()
-    inspector = inspect(bind)
-    return set(inspector.get_table_names())
-
-
 def upgrade() -> None:
-    columns = _existing_columns("template_fields")
+    columns = existing_columns("template_fields")
+    new_columns = []
 
     if "auto_learned_type" not in columns:
-        op.add_column(
-            "template_fields",
-            sa.Column("auto_learned_type", sa.String(length=50), nullable=True),
+        new_columns.append(
+            sa.Column("auto_learned_type", sa.String(length=50), nullable=True)
         )
 
     if "learning_enabled" not in columns:
-        op.add_column(
-            "template_fields",
+        new_columns.append(
             sa.Column(
                 "learning_enabled",
                 sa.Boolean(),
                 nullable=False,
                 server_default=sa.text("1"),
-            ),
+            )
         )
 
     if "last_learned_at" not in columns:
-        op.add_column(
-            "template_fields",
-            sa.Column("last_learned_at", sa.DateTime(), nullable=True),
+        new_columns.append(
+            sa.Column("last_learned_at", sa.DateTime(), nullable=True)
         )
 
-    tables = _existing_tables()
+    add_columns("template_fields", new_columns)
+
+    tables = existing_tables()
 
     if "template_field_hints" not in tables:
-        op.create_table(
+        create_table(
             "template_field_hints",
             sa.Column("id", sa.Integer(), primary_key=True),
             sa.Column("template_field_id", sa.Integer(), nullable=False),
@@ -69,15 +65,14 @@ def upgrade() -> None:
                 "hint_type",
                 name="uq_template_field_hints_field_type",
             ),
-        )
-        op.create_index(
-            "ix_template_field_hints_template_field_id",
-            "template_field_hints",
-            ["template_field_id"],
+            sa.Index(
+                "ix_template_field_hints_template_field_id",
+                "template_field_id",
+            ),
         )
 
     if "correction_feedback" not in tables:
-        op.create_table(
+        create_table(
             "correction_feedback",
             sa.Column("id", sa.Integer(), primary_key=True),
             sa.Column("document_id", sa.Integer(), nullable=False),
@@ -107,34 +102,20 @@ def upgrade() -> None:
                 "corrected_value",
                 name="uq_correction_feedback_document_field_value",
             ),
-        )
-        op.create_index(
-            "ix_correction_feedback_document_id",
-            "correction_feedback",
-            ["document_id"],
-        )
-        op.create_index(
-            "ix_correction_feedback_template_field_id",
-            "correction_feedback",
-            ["template_field_id"],
+            sa.Index("ix_correction_feedback_document_id", "document_id"),
+            sa.Index(
+                "ix_correction_feedback_template_field_id",
+                "template_field_id",
+            ),
         )
 def downgrade() -> None:
-    op.drop_index(
-        "ix_correction_feedback_template_field_id",
-        table_name="correction_feedback",
-    )
-    op.drop_index(
-        "ix_correction_feedback_document_id",
-        table_name="correction_feedback",
-    )
-    op.drop_table("correction_feedback")
+    drop_index("ix_correction_feedback_template_field_id", "correction_feedback")
+    drop_index("ix_correction_feedback_document_id", "correction_feedback")
+    drop_table("correction_feedback")
 
-    op.drop_index(
-        "ix_template_field_hints_template_field_id",
-        table_name="template_field_hints",
-    )
-    op.drop_table("template_field_hints")
+    drop_index("ix_template_field_hints_template_field_id", "template_field_hints")
+    drop_table("template_field_hints")
 
-    op.drop_column("template_fields", "last_learned_at")
-    op.drop_column("template_fields", "learning_enabled")
-    op.drop_column("template_fields", "auto_learned_type")
+    drop_column("template_fields", "last_learned_at")
+    drop_column("template_fields", "learning_enabled")
+    drop_column("template_fields", "auto_learned_type")
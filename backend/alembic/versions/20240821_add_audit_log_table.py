@@ -1,8 +1,13 @@
 """Create audit_logs table for security auditing."""
 
-from alembic import op
 import sqlalchemy as sa
-from sqlalchemy import inspect
+
+from app.utils.migration_helpers import (
+    create_table,
+    drop_index,
+    drop_table,
+    existing_tables,
+)
 
 revision = "7c3e1d2a9f4b"
 down_revision = "b9da4b693915"
@@ -10,19 +15,13 @@ branch_labels = None
 depends_on = None
 
 
-def _existing_tables() -> set[str]:
-    bind = op.get_bind()
-    inspector = inspect(bind)
-    return set(inspector.get_table_names())
-
-
 def upgrade() -> None:
-    tables = _existing_tables()
+    tables = existing_tables()
 
     if "audit_logs" in tables:
         return
 
-    op.create_table(
+    create_table(
         "audit_logs",
         sa.Column("id", sa.Integer(), primary_key=True),
         sa.Column("event_type", sa.String(length=100), nullable=False),
@@ -36,15 +35,14 @@ def upgrade() -> None:
             "created_at",
             sa.DateTime(),
             nullable=False,
-            server_default=sa.func.now(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
         ),
+        sa.Index("ix_audit_logs_event_type", "event_type"),
+        sa.Index("ix_audit_logs_created_at", "created_at"),
     )
 
-    op.create_index("ix_audit_logs_event_type", "audit_logs", ["event_type"])
-    op.create_index("ix_audit_logs_created_at", "audit_logs", ["created_at"])
-
 
 def downgrade() -> None:
-    op.drop_index("ix_audit_logs_created_at", table_name="audit_logs")
-    op.drop_index("ix_audit_logs_event_type", table_name="audit_logs")
-    op.drop_table("audit_logs")
+    drop_index("ix_audit_logs_created_at", "audit_logs")
+    drop_index("ix_audit_logs_event_type", "audit_logs")
+    drop_table("audit_logs")
@@ -2,9 +2,20 @@
 
 import json
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speed-up
+    orjson = None
+
 from alembic import op
 import sqlalchemy as sa
-from sqlalchemy import inspect
+
+from app.utils.migration_helpers import (
+    add_columns,
+    drop_column,
+    existing_columns,
+    report_progress,
+)
 
 # revision identifiers, used by Alembic.
 revision = "b9da4b693915"
@@ -13,149 +24,376 @@ branch_labels = None
 depends_on = None
 
 TABLE_NAME = "template_fields"
+BACKFILL_BATCH_SIZE = 500
+PROCESSING_KEYS = (
+    "processing_mode",
+    "llm_tier",
+    "handwriting_threshold",
+    "auto_detected_handwriting",
+)
+
+UPDATE_TARGET_FIELDS = sa.text(
+    "UPDATE templates SET target_fields = :payload WHERE id = :template_id"
+)
+
+# jsonb values that ``not field.get(key)`` treats as missing in the Python path.
+_FALSY_JSONB = "('null', '\"\"', 'false', '0', '[]', '{}')"
+
+BACKFILL_TARGET_FIELDS_SQL = f"""
+UPDATE templates
+SET target_fields = (
+    SELECT jsonb_agg(
+        CASE
+            WHEN jsonb_typeof(field) = 'object' THEN
+                field
+                || CASE
+                    WHEN COALESCE(field -> 'processing_mode', 'null'::jsonb)
+                        IN {_FALSY_JSONB}
+                    THEN '{{"processing_mode": "auto"}}'::jsonb
+                    ELSE '{{}}'::jsonb
+                END
+                || CASE
+                    WHEN COALESCE(field -> 'llm_tier', 'null'::jsonb)
+                        IN {_FALSY_JSONB}
+                    THEN '{{"llm_tier": "standard"}}'::jsonb
+                    ELSE '{{}}'::jsonb
+                END
+                || CASE
+                    WHEN field ? 'handwriting_threshold' THEN '{{}}'::jsonb
+                    ELSE '{{"handwriting_threshold": null}}'::jsonb
+                END
+                || CASE
+                    WHEN field ? 'auto_detected_handwriting' THEN '{{}}'::jsonb
+                    ELSE '{{"auto_detected_handwriting": false}}'::jsonb
+                END
+            ELSE field
+        END
+        ORDER BY position
+    )
+    FROM jsonb_array_elements(target_fields::jsonb)
+        WITH ORDINALITY AS elements(field, position)
+)::json
+WHERE jsonb_typeof(target_fields::jsonb) = 'array'
+  AND EXISTS (
+    SELECT 1
+    FROM jsonb_array_elements(target_fields::jsonb) AS stale(field)
+    WHERE jsonb_typeof(field) = 'object'
+      AND (
+        COALESCE(field -> 'processing_mode', 'null'::jsonb) IN {_FALSY_JSONB}
+        OR COALESCE(field -> 'llm_tier', 'null'::jsonb) IN {_FALSY_JSONB}
+        OR NOT field ? 'handwriting_threshold'
+        OR NOT field ? 'auto_detected_handwriting'
+      )
+  )
+"""
+
+
+def _sqlite_falsy(key: str) -> str:
+    """SQLite predicate mirroring ``not field.get(key)`` for a json_each row."""
+
+    path = f"'$.{key}'"
+    return f"""(
+            json_type(field.value, {path}) IS NULL
+            OR json_type(field.value, {path}) IN ('null', 'false')
+            OR (json_type(field.value, {path}) = 'text'
+                AND json_extract(field.value, {path}) = '')
+            OR (json_type(field.value, {path}) IN ('integer', 'real')
+                AND json_extract(field.value, {path}) = 0)
+            OR (json_type(field.value, {path}) IN ('array', 'object')
+                AND json_extract(field.value, {path}) IN ('[]', '{{}}'))
+        )"""
+
+
+# The Python backfill reads templates in keyset pages and buffers each page
+# before writing it back: MySQL/MariaDB cannot run the UPDATEs on a connection
+# whose streamed SELECT is still open.
+TEMPLATES_PAGE_SQL = """
+SELECT id, target_fields
+FROM templates
+WHERE id > :last_id
+ORDER BY id
+LIMIT :batch_size
+"""
+
+# Only templates that still miss a default come back to Python, so reruns on
+# an already migrated database decode nothing.
+SQLITE_STALE_TEMPLATES_PAGE_SQL = f"""
+SELECT id, target_fields
+FROM templates
+WHERE id > :last_id
+  AND CASE
+    WHEN json_valid(target_fields) AND json_type(target_fields) = 'array' THEN
+        EXISTS (
+            SELECT 1
+            FROM json_each(templates.target_fields) AS field
+            WHERE field.type = 'object'
+              AND (
+                {_sqlite_falsy("processing_mode")}
+                OR {_sqlite_falsy("llm_tier")}
+                OR json_type(field.value, '$.handwriting_threshold') IS NULL
+                OR json_type(field.value, '$.auto_detected_handwriting') IS NULL
+              )
+        )
+    ELSE 0
+  END
+ORDER BY id
+LIMIT :batch_size
+"""
+
+
+STRIP_TARGET_FIELDS_POSTGRESQL_SQL = f"""
+UPDATE templates
+SET target_fields = (
+    SELECT jsonb_agg(
+        CASE
+            WHEN jsonb_typeof(field) = 'object'
+            THEN field {" ".join(f"- '{key}'" for key in PROCESSING_KEYS)}
+            ELSE field
+        END
+        ORDER BY position
+    )
+    FROM jsonb_array_elements(target_fields::jsonb)
+        WITH ORDINALITY AS elements(field, position)
+)::json
+WHERE jsonb_typeof(target_fields::jsonb) = 'array'
+  AND EXISTS (
+    SELECT 1
+    FROM jsonb_array_elements(target_fields::jsonb) AS tagged(field)
+    WHERE jsonb_typeof(field) = 'object'
+      AND field ?| array[{", ".join(f"'{key}'" for key in PROCESSING_KEYS)}]
+  )
+"""
+
+# json_each reports scalars as SQL values, so JSON literals are rebuilt with
+# json() to keep them from turning into strings inside json_group_array.
+STRIP_TARGET_FIELDS_SQLITE_SQL = f"""
+UPDATE templates
+SET target_fields = (
+    SELECT json_group_array(
+        CASE field.type
+            WHEN 'object' THEN json_remove(
+                field.value, {", ".join(f"'$.{key}'" for key in PROCESSING_KEYS)}
+            )
+            WHEN 'array' THEN json(field.value)
+            WHEN 'true' THEN json('true')
+            WHEN 'false' THEN json('false')
+            WHEN 'null' THEN json('null')
+            ELSE field.value
+        END
+    )
+    FROM (
+        SELECT type, value FROM json_each(templates.target_fields) ORDER BY key
+    ) AS field
+)
+WHERE CASE
+    WHEN json_valid(target_fields) AND json_type(target_fields) = 'array' THEN
+        EXISTS (
+            SELECT 1
+            FROM json_each(templates.target_fields) AS field
+            WHERE field.type = 'object'
+              AND ({" OR ".join(
+                  f"json_type(field.value, '$.{key}') IS NOT NULL"
+                  for key in PROCESSING_KEYS
+              )})
+        )
+    ELSE 0
+END
+"""
 
 
-def _existing_columns() -> set[str]:
-    bind = op.get_bind()
-    inspector = inspect(bind)
-    return {column["name"] for column in inspector.get_columns(TABLE_NAME)}
+def _json_loads(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _json_dumps(value) -> str:
+    """Encode ``value`` as a UTF-8 ``str`` bind parameter, keeping non-ASCII."""
+
+    if orjson is not None:
+        try:
+            return orjson.dumps(value).decode("utf-8")
+        except TypeError:  # e.g. integers outside the 64-bit range
+            pass
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _decode_fields(raw_fields):
+    """Return ``target_fields`` as a list, or ``None`` when it is unusable."""
+
+    if isinstance(raw_fields, list):
+        return raw_fields
+
+    try:
+        fields = _json_loads(raw_fields) if raw_fields else []
+    except (TypeError, ValueError):
+        return None
+
+    return fields if isinstance(fields, list) else None
+
+
+def _apply_processing_defaults(fields) -> bool:
+    updated = False
+
+    for field in fields:
+        if not isinstance(field, dict):
+            continue
+
+        if not field.get("processing_mode"):
+            field["processing_mode"] = "auto"
+            updated = True
+
+        if not field.get("llm_tier"):
+            field["llm_tier"] = "standard"
+            updated = True
+
+        if "handwriting_threshold" not in field:
+            field["handwriting_threshold"] = None
+            updated = True
+
+        if "auto_detected_handwriting" not in field:
+            field["auto_detected_handwriting"] = False
+            updated = True
+
+    return updated
+
+
+def _backfill_target_fields_in_database(bind) -> None:
+    result = bind.execute(sa.text(BACKFILL_TARGET_FIELDS_SQL))
+    report_progress(revision, max(result.rowcount, 0))
+
+
+def _backfill_target_fields_in_python(bind) -> None:
+    if bind.dialect.name == "sqlite":
+        query = sa.text(SQLITE_STALE_TEMPLATES_PAGE_SQL)
+    else:
+        query = sa.text(TEMPLATES_PAGE_SQL)
+
+    last_id = 0
+    scanned = 0
+    while True:
+        page = bind.execute(
+            query, {"last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE}
+        ).fetchall()
+        if not page:
+            break
+
+        pending = []
+        for template_id, raw_fields in page:
+            fields = _decode_fields(raw_fields)
+            if fields is None or not _apply_processing_defaults(fields):
+                continue
+
+            pending.append(
+                {
+                    "payload": _json_dumps(fields),
+                    "template_id": template_id,
+                }
+            )
+
+        if pending:
+            bind.execute(UPDATE_TARGET_FIELDS, pending)
+
+        last_id = page[-1][0]
+        scanned += len(page)
+        report_progress(revision, scanned)
+
+        if len(page) < BACKFILL_BATCH_SIZE:
+            break
+
+
+def _strip_target_fields_in_python(bind) -> None:
+    templates = bind.execute(sa.text("SELECT id, target_fields FROM templates"))
+
+    for row in templates:
+        mapping = row._mapping
+        template_id = mapping["id"]
+        fields = _decode_fields(mapping.get("target_fields"))
+        if fields is None:
+            continue
+
+        updated = False
+
+        for field in fields:
+            if not isinstance(field, dict):
+                continue
+
+            for key in PROCESSING_KEYS:
+                if field.pop(key, None) is not None:
+                    updated = True
+
+        if updated:
+            bind.execute(
+                UPDATE_TARGET_FIELDS,
+                {"payload": _json_dumps(fields), "template_id": template_id},
+            )
 
 
 def upgrade() -> None:
-    columns = _existing_columns()
+    columns = existing_columns(TABLE_NAME)
+    new_columns = []
 
     if "processing_mode" not in columns:
-        op.add_column(
-            TABLE_NAME,
+        new_columns.append(
             sa.Column(
                 "processing_mode",
                 sa.String(length=50),
                 nullable=False,
                 server_default=sa.text("'auto'"),
-            ),
+            )
         )
 
     if "llm_tier" not in columns:
-        op.add_column(
-            TABLE_NAME,
+        new_columns.append(
             sa.Column(
                 "llm_tier",
                 sa.String(length=50),
                 nullable=False,
                 server_default=sa.text("'standard'"),
-            ),
+            )
         )
 
     if "handwriting_threshold" not in columns:
-        op.add_column(
-            TABLE_NAME,
-            sa.Column("handwriting_threshold", sa.Float(), nullable=True),
-        )
+        new_columns.append(sa.Column("handwriting_threshold", sa.Float(), nullable=True))
 
     if "auto_detected_handwriting" not in columns:
-        op.add_column(
-            TABLE_NAME,
+        new_columns.append(
             sa.Column(
                 "auto_detected_handwriting",
                 sa.Boolean(),
                 nullable=False,
                 server_default=sa.text("0"),
-            ),
+            )
         )
 
-    bind = op.get_bind()
-    templates = bind.execute(sa.text("SELECT id, target_fields FROM templates"))
-
-    for row in templates:
-        mapping = row._mapping
-        template_id = mapping["id"]
-        raw_fields = mapping.get("target_fields")
-
-        try:
-            fields = json.loads(raw_fields) if raw_fields else []
-        except (TypeError, ValueError):
-            fields = []
-
-        if not isinstance(fields, list):
-            continue
-
-        updated = False
-
-        for field in fields:
-            if not isinstance(field, dict):
-                continue
-
-            if not field.get("processing_mode"):
-                field["processing_mode"] = "auto"
-                updated = True
-
-            if not field.get("llm_tier"):
-                field["llm_tier"] = "standard"
-                updated = True
-
-            if "handwriting_threshold" not in field:
-                field["handwriting_threshold"] = None
-                updated = True
+    add_columns(TABLE_NAME, new_columns)
 
-            if "auto_detected_handwriting" not in field:
-                field["auto_detected_handwriting"] = False
-                updated = True
-
-        if updated:
-            bind.execute(
-                sa.text("UPDATE templates SET target_fields = :payload WHERE id = :template_id"),
-                {"payload": json.dumps(fields, ensure_ascii=False), "template_id": template_id},
-            )
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        _backfill_target_fields_in_database(bind)
+    else:
+        _backfill_target_fields_in_python(bind)
 
 
 def downgrade() -> None:
-    columns = _existing_columns()
+    columns = existing_columns(TABLE_NAME)
 
     if "auto_detected_handwriting" in columns:
-        op.drop_column(TABLE_NAME, "auto_detected_handwriting")
+        drop_column(TABLE_NAME, "auto_detected_handwriting")
 
     if "handwriting_threshold" in columns:
-        op.drop_column(TABLE_NAME, "handwriting_threshold")
+        drop_column(TABLE_NAME, "handwriting_threshold")
 
     if "llm_tier" in columns:
-        op.drop_column(TABLE_NAME, "llm_tier")
+        drop_column(TABLE_NAME, "llm_tier")
 
     if "processing_mode" in columns:
-        op.drop_column(TABLE_NAME, "processing_mode")
+        drop_column(TABLE_NAME, "processing_mode")
 
     bind = op.get_bind()
-    templates = bind.execute(sa.text("SELECT id, target_fields FROM templates"))
-
-    for row in templates:
-        mapping = row._mapping
-        template_id = mapping["id"]
-        raw_fields = mapping.get("target_fields")
-
-        try:
-            fields = json.loads(raw_fields) if raw_fields else []
-        except (TypeError, ValueError):
-            fields = []
-
-        if not isinstance(fields, list):
-            continue
-
-        updated = False
-
-        for field in fields:
-            if not isinstance(field, dict):
-                continue
-
-            if field.pop("processing_mode", None) is not None:
-                updated = True
-            if field.pop("llm_tier", None) is not None:
-                updated = True
-            if field.pop("handwriting_threshold", None) is not None:
-                updated = True
-            if field.pop("auto_detected_handwriting", None) is not None:
-                updated = True
-
-        if updated:
-            bind.execute(
-                sa.text("UPDATE templates SET target_fields = :payload WHERE id = :template_id"),
-                {"payload": json.dumps(fields, ensure_ascii=False), "template_id": template_id},
-            )
+    if bind.dialect.name == "postgresql":
+        bind.execute(sa.text(STRIP_TARGET_FIELDS_POSTGRESQL_SQL))
+    elif bind.dialect.name == "sqlite":
+        bind.execute(sa.text(STRIP_TARGET_FIELDS_SQLITE_SQL))
+    else:
+        _strip_target_fields_in_python(bind)
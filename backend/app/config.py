@@ -1,150 +1,410 @@
 # -*- coding: utf-8 -*-
+import logging
 import os
-import shutil
-from typing import Tuple
-from dotenv import load_dotenv
+import re
+import sys
+from functools import lru_cache
+from typing import Any, Callable, Dict, Final, FrozenSet, Optional, Set, Tuple
 from pathlib import Path
 
-# Load environment variables
-load_dotenv()
+try:
+    from app import _config_frozen
+except ImportError:  # pragma: no cover - generated by ``python -m app.config --freeze``
+    _config_frozen = None
 
+logger = logging.getLogger(__name__)
 
-def _get_env_float(name: str, default: float) -> float:
-    """Safely parse float values from environment variables."""
 
-    value = os.getenv(name)
-    if value in (None, ""):
-        return default
+def _to_bool(value: str) -> bool:
+    """Interpret common truthy spellings; anything else is ``False``."""
+
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _find_dotenv() -> Optional[Path]:
+    """Locate `.env` the way ``load_dotenv()`` does: upwards from this file."""
+
+    directory = Path(os.path.dirname(os.path.abspath(__file__)))
+    for candidate in (directory, *directory.parents):
+        path = candidate / ".env"
+        if path.is_file():
+            return path
+    return None
+
+
+def _parse_simple_dotenv(text: str) -> Optional[Dict[str, str]]:
+    """Parse plain ``KEY=VALUE`` lines.
+
+    Returns ``None`` for anything beyond that (variable expansion, escapes,
+    multiline values, bare keys) so python-dotenv can handle the file.
+    """
+
+    values: Dict[str, str] = {}
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("export "):
+            line = line[len("export "):].lstrip()
+
+        key, separator, value = line.partition("=")
+        key, value = key.strip(), value.strip()
+        if not separator or not key or "${" in value:
+            return None
+
+        if value[:1] in {"'", '"'}:
+            end = value.find(value[0], 1)
+            if end == -1 or "\\" in value[1:end]:
+                return None
+            trailing = value[end + 1:].strip()
+            if trailing and not trailing.startswith("#"):
+                return None
+            value = value[1:end]
+        else:
+            for index, char in enumerate(value):
+                if char == "#" and index and value[index - 1].isspace():
+                    value = value[:index].rstrip()
+                    break
+
+        values[key] = value
+    return values
+
+
+def _dotenv_disabled() -> bool:
+    """Whether the environment is injected directly and `.env` is not read."""
+
+    getenv = os.environ.get
+    return (
+        _to_bool(getenv("DOTENV_SKIP", ""))
+        or _to_bool(getenv("CONFIG_READY", ""))
+        or getenv("ENV", "").strip().lower() == "production"
+    )
+
+
+def _load_dotenv_file(path: Path) -> None:
+    values = _parse_simple_dotenv(path.read_text(encoding="utf-8"))
+    if values is not None:
+        setdefault = os.environ.setdefault
+        for key, value in values.items():
+            setdefault(key, value)
+        return
 
     try:
-        return float(value)
-    except (TypeError, ValueError):
-        return default
+        from dotenv import load_dotenv
+    except ImportError:  # pragma: no cover - only needed for complex .env files
+        logger.warning(".env dosyası python-dotenv olmadan okunamadı: %s", path)
+        return
+
+    load_dotenv(path)
+
+
+def _load_environment() -> Dict[str, str]:
+    """Load `.env` once and snapshot the resulting process environment.
+
+    Deployments that inject variables directly set ``CONFIG_READY=1``,
+    ``DOTENV_SKIP=1`` or ``ENV=production`` to skip the file entirely.
+    """
+
+    if not _dotenv_disabled():
+        path = _find_dotenv()
+        if path is not None:
+            _load_dotenv_file(path)
+
+    return dict(os.environ)
+
+
+# Load environment variables; settings read from this dict, not os.environ.
+# A frozen build snapshot replaces the .env lookup; secrets still come from
+# the process environment because they are never written to the snapshot.
+if _config_frozen is not None:
+    _ENV_SNAPSHOT: Dict[str, str] = {**os.environ, **_config_frozen.ENV}
+else:
+    _ENV_SNAPSHOT = _load_environment()
+
+# Bound once; every setting below goes through this lookup.
+_snapshot_get = _ENV_SNAPSHOT.get
+
+# Names the settings actually read, used by ``--freeze``.
+_READ_NAMES: Set[str] = set()
 
 
-def _get_env_int(name: str, default: int) -> int:
-    """Safely parse integer values from environment variables."""
+@lru_cache(maxsize=None)
+def _env(name: str, default: Any, cast: Callable[[str], Any] = str) -> Any:
+    """Read ``name`` from the environment snapshot, cast it, and memoize it.
 
-    value = os.getenv(name)
-    if value in (None, ""):
+    Missing, empty or unparsable values fall back to ``default``.
+    """
+
+    _READ_NAMES.add(name)
+    value = _snapshot_get(name)
+    if not value:
         return default
 
     try:
-        return int(value)
+        return cast(value)
     except (TypeError, ValueError):
         return default
 
 
-def _get_env_bool(name: str, default: bool) -> bool:
-    """Parse boolean environment variables with sensible defaults."""
+_LIST_SPLIT = re.compile(r"\s*,\s*").split
 
-    value = os.getenv(name)
-    if value in (None, ""):
-        return default
 
-    normalized = value.strip().lower()
-    return normalized in {"1", "true", "yes", "on"}
+@lru_cache(maxsize=None)
+def _get_env_list(name: str, default: str) -> Tuple[str, ...]:
+    """Parse a comma-separated environment variable into lowercase items."""
+
+    _READ_NAMES.add(name)
+    value = _snapshot_get(name, default)
+    return tuple(item.lower() for item in _LIST_SPLIT(value.strip()) if item)
+
+
+# Upload limits and extensions as plain module constants for hot paths;
+# Settings mirrors them.
+MAX_FILE_SIZE_MB: Final[int] = _env("MAX_FILE_SIZE_MB", 10, int)
+MAX_FILE_SIZE_BYTES: Final[int] = MAX_FILE_SIZE_MB * 1024 * 1024
+MAX_BATCH_SIZE: Final[int] = 100
+ALLOWED_EXTENSIONS: Final[FrozenSet[str]] = frozenset(
+    map(sys.intern, (".pdf", ".jpg", ".jpeg", ".png", ".xlsx", ".xls", ".csv"))
+)
+ALLOWED_TEMPLATE_EXTENSIONS: Final[FrozenSet[str]] = frozenset(
+    map(sys.intern, (".xlsx", ".xls", ".csv"))
+)
+
+
+def _ensure_dir(path: str) -> Path:
+    """Create ``path`` unless it already exists and return it as a Path.
+
+    A single stat covers the usual case of an existing directory;
+    ``mkdir(exist_ok=True)`` would issue a failing mkdir plus a stat.
+    """
+
+    if not os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
+    return Path(path)
 
 
 class Settings:
     """Application configuration settings"""
 
     # OpenAI Configuration
-    OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
-    OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4o")
-    AI_PRIMARY_MODEL: str = os.getenv("AI_PRIMARY_MODEL", OPENAI_MODEL)
-    AI_PRIMARY_TEMPERATURE: float = _get_env_float("AI_PRIMARY_TEMPERATURE", 0.8)
-    AI_PRIMARY_CONTEXT_WINDOW: int = _get_env_int("AI_PRIMARY_CONTEXT_WINDOW", 2000)
-    AI_VISION_MODEL: str = os.getenv("AI_VISION_MODEL", "gpt-4o-mini")
-
-    AI_HANDWRITING_MODEL: str = os.getenv("AI_HANDWRITING_MODEL", "gpt-5")
-    AI_HANDWRITING_REASONING_EFFORT: str = os.getenv(
+    OPENAI_API_KEY: str = _env("OPENAI_API_KEY", "")
+    OPENAI_MODEL: str = _env("OPENAI_MODEL", "gpt-4o")
+    AI_PRIMARY_MODEL: str = _env("AI_PRIMARY_MODEL", OPENAI_MODEL)
+    AI_PRIMARY_TEMPERATURE: float = _env("AI_PRIMARY_TEMPERATURE", 0.8, float)
+    AI_PRIMARY_CONTEXT_WINDOW: int = _env("AI_PRIMARY_CONTEXT_WINDOW", 2000, int)
+    # Short documents are mapped by this cheaper model (e.g. gpt-4o-mini)
+    # first; the primary model only runs when its answer stays below the
+    # confidence floor. Empty (the default) always uses the primary model.
+    AI_FALLBACK_MODEL: str = _env("AI_FALLBACK_MODEL", "")
+    AI_FALLBACK_MAX_OCR_CHARS: int = _env("AI_FALLBACK_MAX_OCR_CHARS", 2000, int)
+    AI_FALLBACK_MAX_FIELDS: int = _env("AI_FALLBACK_MAX_FIELDS", 8, int)
+    AI_FALLBACK_MIN_CONFIDENCE: float = _env(
+        "AI_FALLBACK_MIN_CONFIDENCE", 0.5, float
+    )
+    # Skip the model when every field has exactly one template/hint regex
+    # match; those values are returned as-is.
+    AI_MAPPER_ALLOW_REGEX_SHORTCUT: bool = _env(
+        "AI_MAPPER_ALLOW_REGEX_SHORTCUT", True, _to_bool
+    )
+    AI_VISION_MODEL: str = _env("AI_VISION_MODEL", "gpt-4o-mini")
+
+    AI_HANDWRITING_MODEL: str = _env("AI_HANDWRITING_MODEL", "gpt-5")
+    AI_HANDWRITING_REASONING_EFFORT: str = _env(
         "AI_HANDWRITING_REASONING_EFFORT", "high"
     )
-    AI_HANDWRITING_TEMPERATURE: float = _get_env_float(
-        "AI_HANDWRITING_TEMPERATURE", 0.3
+    AI_HANDWRITING_TEMPERATURE: float = _env(
+        "AI_HANDWRITING_TEMPERATURE", 0.3, float
     )  # Responses API top_p desteklemediği için yalnızca referans amaçlıdır
-    AI_HANDWRITING_CONTEXT_WINDOW: int = _get_env_int(
-        "AI_HANDWRITING_CONTEXT_WINDOW", 4000
+    AI_HANDWRITING_CONTEXT_WINDOW: int = _env(
+        "AI_HANDWRITING_CONTEXT_WINDOW", 4000, int
     )  # reasoning modellerinde max_output_tokens olarak kullanılır
-    AI_HANDWRITING_LOW_CONFIDENCE_THRESHOLD: float = _get_env_float(
-        "AI_HANDWRITING_LOW_CONFIDENCE_THRESHOLD", 0.55
+    AI_HANDWRITING_LOW_CONFIDENCE_THRESHOLD: float = _env(
+        "AI_HANDWRITING_LOW_CONFIDENCE_THRESHOLD", 0.55, float
     )
-    AI_HANDWRITING_MAX_WORKERS: int = _get_env_int("AI_HANDWRITING_MAX_WORKERS", 2)
-    AI_HANDWRITING_TIERS: Tuple[str, ...] = tuple(
-        tier.strip().lower()
-        for tier in os.getenv("AI_HANDWRITING_TIERS", "handwriting,guided").split(",")
-        if tier.strip()
+    AI_HANDWRITING_MAX_WORKERS: int = _env("AI_HANDWRITING_MAX_WORKERS", 2, int)
+    AI_HANDWRITING_TIERS: Tuple[str, ...] = _get_env_list(
+        "AI_HANDWRITING_TIERS", "handwriting,guided"
     )
 
     # Database Configuration
-    DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./digitalization.db")
+    DATABASE_URL: str = _env("DATABASE_URL", "sqlite:///./digitalization.db")
+    # off: run `alembic upgrade head` manually; sync: block startup until the
+    # upgrade finishes; async: upgrade on a background thread while serving.
+    MIGRATION_MODE: str = _env("MIGRATION_MODE", "off").strip().lower()
 
     # OCR Configuration
-    TESSERACT_CMD: str = os.getenv("TESSERACT_CMD", "tesseract")
-    TESSDATA_PREFIX: str = os.getenv("TESSDATA_PREFIX", "")
+    TESSERACT_CMD: str = _env("TESSERACT_CMD", "tesseract")
+    TESSDATA_PREFIX: str = _env("TESSDATA_PREFIX", "")
     TESSERACT_LANG: str = "tur+eng"  # Turkish + English
-    OCR_ENGINE: str = os.getenv("OCR_ENGINE", "tesseract")
-    EASYOCR_USE_GPU: bool = _get_env_bool("EASYOCR_USE_GPU", False)
+    OCR_ENGINE: str = _env("OCR_ENGINE", "tesseract")
+    EASYOCR_USE_GPU: bool = _env("EASYOCR_USE_GPU", False, _to_bool)
 
     # Data Protection
-    DATA_MASKING_ENABLED: bool = _get_env_bool("DATA_MASKING_ENABLED", True)
+    DATA_MASKING_ENABLED: bool = _env("DATA_MASKING_ENABLED", True, _to_bool)
 
     # File Upload Configuration
-    MAX_FILE_SIZE_MB: int = int(os.getenv("MAX_FILE_SIZE_MB", "10"))
-    MAX_FILE_SIZE_BYTES: int = MAX_FILE_SIZE_MB * 1024 * 1024
-    ALLOWED_EXTENSIONS: set = {".pdf", ".jpg", ".jpeg", ".png", ".xlsx", ".xls", ".csv"}
-    ALLOWED_TEMPLATE_EXTENSIONS: set = {".xlsx", ".xls", ".csv"}
-
-    # Directory Configuration
-    BASE_DIR: Path = Path(__file__).resolve().parent.parent
-    UPLOAD_DIR: Path = BASE_DIR / os.getenv("UPLOAD_DIR", "uploads")
-    OUTPUT_DIR: Path = BASE_DIR / os.getenv("OUTPUT_DIR", "outputs")
-    TEMP_DIR: Path = UPLOAD_DIR / "temp"
-
-    # CORS Configuration
-    CORS_ORIGINS: list = [
-        "http://localhost:3000",
-        "http://localhost:3001",
-        "http://127.0.0.1:3000",
-    ]
+    MAX_FILE_SIZE_MB: int = MAX_FILE_SIZE_MB
+    MAX_FILE_SIZE_BYTES: int = MAX_FILE_SIZE_BYTES
+    ALLOWED_EXTENSIONS: FrozenSet[str] = ALLOWED_EXTENSIONS
+    ALLOWED_TEMPLATE_EXTENSIONS: FrozenSet[str] = ALLOWED_TEMPLATE_EXTENSIONS
+
+    # Directory Configuration (created on first access, see properties below)
+    # abspath skips the per-component symlink walk of Path.resolve(); set
+    # RESOLVE_SYMLINKS=1 when the app must follow a symlinked checkout.
+    BASE_DIR: Path = (
+        Path(__file__).resolve().parent.parent
+        if _env("RESOLVE_SYMLINKS", False, _to_bool)
+        else Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    )
+    # Plain strings until first access; each property builds its Path once.
+    _UPLOAD_DIR_PATH: str = os.path.join(BASE_DIR, _env("UPLOAD_DIR", "uploads"))
+    _OUTPUT_DIR_PATH: str = os.path.join(BASE_DIR, _env("OUTPUT_DIR", "outputs"))
+    _TEMP_DIR_PATH: str = os.path.join(_UPLOAD_DIR_PATH, "temp")
+
+    # CORS Configuration (CORSMiddleware checks membership on every request)
+    CORS_ORIGINS: FrozenSet[str] = frozenset(
+        (
+            "http://localhost:3000",
+            "http://localhost:3001",
+            "http://127.0.0.1:3000",
+        )
+    )
 
     # Batch Processing
-    MAX_BATCH_SIZE: int = 100
+    MAX_BATCH_SIZE: int = MAX_BATCH_SIZE
+    # Documents of one batch job whose AI calls may be in flight at once
+    BATCH_MAX_CONCURRENCY: int = _env("BATCH_MAX_CONCURRENCY", 4, int)
+
+    _instance: Optional["Settings"] = None
+
+    def __new__(cls):
+        """Return the shared instance, building it on first use"""
+        if cls._instance is None:
+            instance = super().__new__(cls)
+            # Directory caches, filled on first access by the properties below
+            instance._upload_dir = None
+            instance._output_dir = None
+            instance._temp_dir = None
+            cls._instance = instance
+        return cls._instance
+
+    @property
+    def UPLOAD_DIR(self) -> Path:
+        if self._upload_dir is None:
+            self._upload_dir = _ensure_dir(self._UPLOAD_DIR_PATH)
+        return self._upload_dir
+
+    @property
+    def OUTPUT_DIR(self) -> Path:
+        if self._output_dir is None:
+            self._output_dir = _ensure_dir(self._OUTPUT_DIR_PATH)
+        return self._output_dir
+
+    @property
+    def TEMP_DIR(self) -> Path:
+        if self._temp_dir is None:
+            self._temp_dir = _ensure_dir(self._TEMP_DIR_PATH)
+        return self._temp_dir
+
+
+def __getattr__(name: str):
+    """Build ``settings`` (and validate it) on first access"""
+    if name == "settings":
+        global settings
+        settings = Settings()
+        if not _env("SKIP_CONFIG_VALIDATION", False, _to_bool):
+            validate_config()
+        return settings
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    def __init__(self):
-        """Create necessary directories on initialization"""
-        self.UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-        self.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-        self.TEMP_DIR.mkdir(parents=True, exist_ok=True)
 
+# Validation
+_warned: Set[str] = set()
 
-# Create settings instance
-settings = Settings()
+
+def _warn_once(level: int, message: str, *args: object) -> None:
+    """Log a configuration message only the first time it is raised"""
+    key = message % args if args else message
+    if key not in _warned:
+        _warned.add(key)
+        logger.log(level, message, *args)
+
+
+@lru_cache(maxsize=8)
+def _find_tesseract(cmd: str, path: str) -> bool:
+    """Return whether ``cmd`` is an existing file or resolvable on ``path``"""
+    if Path(cmd).is_file():
+        return True
+
+    import shutil
+
+    return shutil.which(cmd, path=path) is not None
 
 
-# Validation
 def validate_config():
     """Validate critical configuration"""
+    settings = Settings()
     if not settings.OPENAI_API_KEY:
-        print("⚠️  UYARI: OPENAI_API_KEY ayarlanmamış. AI özellikleri çalışmayacak.")
+        _warn_once(
+            logging.WARNING,
+            "OPENAI_API_KEY ayarlanmamış. AI özellikleri çalışmayacak.",
+        )
 
     if settings.OCR_ENGINE.strip().lower() == "tesseract":
         tesseract_cmd = settings.TESSERACT_CMD.strip().strip('"')
-        cmd_path = Path(tesseract_cmd)
-        if cmd_path.is_file():
-            exists = cmd_path.exists()
-        else:
-            exists = shutil.which(tesseract_cmd) is not None
-
-        if not exists and tesseract_cmd not in {"", "tesseract"}:
-            print(f"⚠️  UYARI: Tesseract bulunamadı: {settings.TESSERACT_CMD}")
-            print("   Tesseract'ı yükleyin: https://github.com/tesseract-ocr/tesseract")
+        # The default command is resolved later by pytesseract; only probe
+        # explicitly configured paths.
+        if tesseract_cmd not in {"", "tesseract"} and not _find_tesseract(
+            tesseract_cmd, os.environ.get("PATH", "")
+        ):
+            _warn_once(
+                logging.WARNING,
+                "Tesseract bulunamadı: %s. Tesseract'ı yükleyin: "
+                "https://github.com/tesseract-ocr/tesseract",
+                settings.TESSERACT_CMD,
+            )
     else:
-        print("ℹ️  Bilgi: OCR motoru EasyOCR olarak yapılandırıldı.")
+        _warn_once(logging.INFO, "OCR motoru EasyOCR olarak yapılandırıldı.")
 
     return True
 
 
-# Run validation on import
-validate_config()
+# Build-time snapshot
+FROZEN_CONFIG_PATH = Path(__file__).with_name("_config_frozen.py")
+_SECRET_NAME = re.compile(r"KEY|SECRET|TOKEN|PASSWORD|DATABASE_URL")
+
+
+def freeze_config(path: Path = FROZEN_CONFIG_PATH) -> Path:
+    """Write the current non-secret settings to ``path`` as Python literals"""
+    Settings()
+    frozen = {
+        name: _ENV_SNAPSHOT[name]
+        for name in sorted(_READ_NAMES)
+        if name in _ENV_SNAPSHOT and not _SECRET_NAME.search(name)
+    }
+    lines = [
+        "# -*- coding: utf-8 -*-",
+        "# Generated by `python -m app.config --freeze`; do not edit.",
+        "ENV = {",
+        *(f"    {name!r}: {value!r}," for name, value in frozen.items()),
+        "}",
+        "",
+    ]
+    path.write_text("\n".join(lines), encoding="utf-8")
+    return path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Yapılandırma yardımcıları")
+    parser.add_argument(
+        "--freeze",
+        action="store_true",
+        help="Geçerli ortam değerlerini _config_frozen.py dosyasına yaz",
+    )
+    args = parser.parse_args()
+    if args.freeze:
+        print(freeze_config())
+    else:
+        parser.print_help()
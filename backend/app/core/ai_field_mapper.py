@@ -1,38 +1,388 @@
 # -*- coding: utf-8 -*-
+import asyncio
+import copy
+import hashlib
 import inspect
 import json
 import logging
 import re
-from collections import defaultdict
-from typing import Any, Dict, List, Optional
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 from app.config import settings
 from app.utils.data_masker import DataMasker
 from app.utils.smart_openai import (
+    build_reasoning_request,
     call_reasoning_model,
+    configure_legacy_openai,
     extract_reasoning_response_text,
+    get_openai_client,
+    load_openai_sdk,
+    loads_json,
 )
 
-try:  # pragma: no cover - prefer modern OpenAI client
-    from openai import OpenAI, AuthenticationError, OpenAIError
-except ImportError:  # pragma: no cover - fallback for legacy client
-    OpenAI = None  # type: ignore
-    import openai  # type: ignore
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speed-up
+    orjson = None
 
+logger = logging.getLogger(__name__)
+
+# Documents mapped at once by map_many
+DEFAULT_MAX_CONCURRENCY = 10
+
+# OpenAI Batch API polling
+BATCH_POLL_INTERVAL_SECONDS = 30.0
+BATCH_TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+# Completion budget of chat models: room for every field's mapping entry,
+# never more than the configured context window. Reasoning models keep the
+# full window because their hidden reasoning tokens count against it.
+MAPPING_BASE_COMPLETION_TOKENS = 200
+MAPPING_TOKENS_PER_FIELD = 80
+MAPPING_MIN_COMPLETION_TOKENS = 256
+
+# Response format sent with every mapping request (never mutated)
+_JSON_OBJECT_FORMAT: Dict[str, str] = {"type": "json_object"}
+
+# Parsed mappings of recently seen (model, OCR text, fields, hints) inputs,
+# before OCR confidences are merged in. Re-running a document is then free,
+# even when the new OCR pass only differs in spacing or blank lines.
+MAPPING_CACHE_SIZE = 1024
+_MAPPING_CACHE: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_MAPPING_CACHE_LOCK = threading.Lock()
+
+# Signature introspection results per (shared) client instance.
+_RESPONSE_FORMAT_SUPPORT: "weakref.WeakKeyDictionary[Any, Tuple[bool, bool, bool]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _signature_accepts_kwarg(method: Any, keyword: str) -> bool:
     try:
-        from openai.error import AuthenticationError, OpenAIError  # type: ignore
-    except ImportError:  # pragma: no cover - final fallback
-        AuthenticationError = Exception
-        OpenAIError = Exception
-else:
-    import openai  # type: ignore
+        signature = inspect.signature(method)
+    except (TypeError, ValueError):  # pragma: no cover - fall back safely
+        return False
 
-logger = logging.getLogger(__name__)
+    for parameter in signature.parameters.values():
+        if parameter.kind == inspect.Parameter.VAR_KEYWORD:
+            return True
+
+    return keyword in signature.parameters
+
+
+_function_accepts_kwarg = lru_cache(maxsize=64)(_signature_accepts_kwarg)
+
+
+# Runs of spaces/tabs; OCR re-runs of one page differ mostly in these.
+_INLINE_SPACE_PATTERN = re.compile(r"[^\S\n]+")
+
+
+def _cache_text(ocr_text: str) -> str:
+    """OCR text as the cache key sees it: same lines, spacing normalized."""
+
+    collapsed = _INLINE_SPACE_PATTERN.sub(" ", ocr_text)
+    return "\n".join(line for line in map(str.strip, collapsed.split("\n")) if line)
+
+
+def _cached_mapping(key: str) -> Optional[Dict[str, Any]]:
+    with _MAPPING_CACHE_LOCK:
+        cached = _MAPPING_CACHE.get(key)
+        if cached is None:
+            return None
+        _MAPPING_CACHE.move_to_end(key)
+    return copy.deepcopy(cached)
+
+
+def _store_mapping(key: str, result: Dict[str, Any]) -> None:
+    snapshot = copy.deepcopy(result)
+    with _MAPPING_CACHE_LOCK:
+        _MAPPING_CACHE[key] = snapshot
+        _MAPPING_CACHE.move_to_end(key)
+        while len(_MAPPING_CACHE) > MAPPING_CACHE_SIZE:
+            _MAPPING_CACHE.popitem(last=False)
+
+
+def _discard_mapping(key: str) -> None:
+    with _MAPPING_CACHE_LOCK:
+        _MAPPING_CACHE.pop(key, None)
+
+
+@lru_cache(maxsize=128)
+def _flag_value(candidates: Tuple[Any, ...]) -> int:
+    """Bitmask for a tuple of flag names/values; see ``_regex_flag_value``."""
+
+    flag_value = 0
+    for candidate in candidates:
+        if isinstance(candidate, int):
+            flag_value |= candidate
+            continue
+        if not isinstance(candidate, str):
+            continue
+        attr = getattr(re, candidate.upper(), None)
+        if isinstance(attr, int):
+            flag_value |= attr
+
+    return flag_value or re.IGNORECASE
+
+
+# User supplied template/hint patterns repeat across documents.
+@lru_cache(maxsize=512)
+def _hint_pattern(pattern: str, flags: int = 0) -> Optional["re.Pattern[str]"]:
+    """Compiled template pattern, or ``None`` if it does not compile.
+
+    Broken patterns are remembered too, so an invalid template hint is only
+    compiled (and reported) once per process rather than once per document.
+    """
+
+    try:
+        return re.compile(pattern, flags)
+    except re.error as exc:
+        logger.warning("Geçersiz regex (%s): %s", pattern, exc)
+        return None
+
+
+_VALUE_TOKEN_PATTERN = re.compile(r"[0-9A-Za-zçğıöşüÇĞİÖŞÜ]+")
+# Digit lookarounds rather than \b: OCR often glues digits to letters, and a
+# failed match is rejected without trying every grouping of the digit run.
+# Dates and numbers share one scan; a date is never also reported as numbers.
+_AUTO_VALUE_PATTERN = re.compile(
+    r"(?P<date>(?<!\d)\d{1,2}[./-]\d{1,2}[./-]\d{2,4}(?!\d))"
+    r"|(?P<number>(?<!\d)\d{1,3}(?:[.,]\d{3})*(?:[.,]\d+)?(?!\d))"
+)
+AUTO_DATE_MATCH_LIMIT = 3
+AUTO_NUMBER_MATCH_LIMIT = 5
+# raw_decode runs the C scanner from a given offset and reports where the
+# object ended, so extraction needs no Python-level brace counting.
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _scan_auto_values(
+    text: str, want_dates: bool, want_numbers: bool
+) -> Tuple[List[str], List[str]]:
+    """First distinct dates and numbers in ``text``, stopping once both are full."""
+
+    limits = {
+        'date': AUTO_DATE_MATCH_LIMIT if want_dates else 0,
+        'number': AUTO_NUMBER_MATCH_LIMIT if want_numbers else 0,
+    }
+    found: Dict[str, Dict[str, None]] = {'date': {}, 'number': {}}
+    pending = sum(1 for limit in limits.values() if limit)
+    for match in _AUTO_VALUE_PATTERN.finditer(text):
+        if not pending:
+            break
+        kind = match.lastgroup
+        bucket = found[kind]
+        if len(bucket) < limits[kind]:
+            bucket[match.group()] = None
+            if len(bucket) == limits[kind]:
+                pending -= 1
+    return list(found['date']), list(found['number'])
+
+
+def _value_matches_data_type(value: str, data_type: Any) -> bool:
+    """Whether ``value`` is shaped like a ``date``/``number``; other types pass."""
+
+    if data_type not in ('date', 'number'):
+        return True
+    match = _AUTO_VALUE_PATTERN.fullmatch(value)
+    return match is not None and match.lastgroup == data_type
+
+
+_TOKEN_KEEP_CHARS = frozenset(
+    "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZçğıöşüÇĞİÖŞÜ"
+)
+
+
+class _TokenCharFilter(dict):
+    """``str.translate`` table that drops every character outside the keep set.
+
+    Entries are filled in on first sight of a code point, so any Unicode input
+    is handled while lookups for already seen characters stay in C.
+    """
+
+    def __missing__(self, codepoint: int) -> Optional[int]:
+        value = codepoint if chr(codepoint) in _TOKEN_KEEP_CHARS else None
+        self[codepoint] = value
+        return value
+
+
+_TOKEN_CHAR_FILTER = _TokenCharFilter()
+
+
+# OCR words and field values repeat heavily across documents ("Toplam", ...).
+@lru_cache(maxsize=4096)
+def _normalize_token(token: str) -> str:
+    """Normalize tokens for fuzzy OCR comparisons."""
+
+    return token.translate(_TOKEN_CHAR_FILTER).lower()
+
+
+class _FieldSpec(NamedTuple):
+    """The template field attributes copied into every mapping entry."""
+
+    name: str
+    data_type: Any
+    required: bool
+    # Template for the entry's metadata; only ever handed out as a copy.
+    metadata: Dict[str, Any]
+
+
+def _field_specs(template_fields: List[Dict[str, Any]]) -> List[_FieldSpec]:
+    """Read each named template field once for the result builders."""
+
+    specs: List[_FieldSpec] = []
+    for field in template_fields:
+        get = field.get
+        name = get('field_name')
+        if name:
+            data_type = get('data_type')
+            required = bool(get('required', False))
+            specs.append(_FieldSpec(name, data_type, required, {
+                'data_type': data_type,
+                'required': required,
+                'regex_hint': get('regex_hint'),
+                'ocr_psm': get('ocr_psm'),
+                'ocr_roi': get('ocr_roi'),
+            }))
+    return specs
+
+
+def _mapping_entry(
+    spec: _FieldSpec, value: Any, confidence: float, source: str
+) -> Dict[str, Any]:
+    """Build one ``field_mappings`` entry; each gets its own metadata dict."""
+
+    return {
+        'value': value,
+        'confidence': confidence,
+        'source': source,
+        'data_type': spec.data_type,
+        'required': spec.required,
+        'metadata': dict(spec.metadata),
+    }
+
+
+class _JsonObjectCollector:
+    """Accumulate streamed text and report when the outer JSON object closes."""
+
+    def __init__(self) -> None:
+        self._parts: List[str] = []
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def feed(self, piece: str) -> bool:
+        if not piece:
+            return False
+
+        self._parts.append(piece)
+        for char in piece:
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = self._started
+            elif char == "{":
+                self._depth += 1
+                self._started = True
+            elif char == "}" and self._started:
+                self._depth -= 1
+                if self._depth == 0:
+                    return True
+        return False
+
+
+def _compact_json(value: Any, default: Optional[Any] = None) -> str:
+    """Serialize payloads without indentation, keeping non-ASCII text."""
+
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                value, default=default, option=orjson.OPT_NON_STR_KEYS
+            ).decode("utf-8")
+        except TypeError:  # e.g. integers outside the 64-bit range
+            pass
+    return json.dumps(
+        value, ensure_ascii=False, separators=(',', ':'), default=default
+    )
 
 
 class AIFieldMapper:
     """Uses OpenAI GPT models (default: gpt-4o) to map OCR text to template fields"""
 
+    # Static prompt sections, built once instead of on every request.
+    _INSTRUCTION_BLOCK = (
+        "Amaç: OCR çıktısından hedef alan değerlerini tespit etmek, verilen "
+        "kısıtları uygulamak ve normalize edilmiş JSON yanıtı üretmek.\n"
+        "Öncelik Hiyerarşisi:\n"
+        "  1. Regex ipuçları ve ROI/PSM eşleşmeleriyle doğrulanmış sonuçlar.\n"
+        "  2. Aynı satır/sütun bağlamındaki açık metin eşleşmeleri.\n"
+        "  3. Destekleyici kanıtı olan çıkarımlar.\n"
+        "  4. Kanıt yoksa değeri null döndür.\n"
+        "Normalizasyon Kuralları:\n"
+        "  - Tarihler: DD.MM.YYYY veya DD/MM/YYYY, gün ve ay iki haneli.\n"
+        "  - Sayılar: Binlik ayracı nokta, ondalık virgül (ör: 1.234,56).\n"
+        "  - Metinler: Baş/son boşlukları temizle, Türkçe karakterleri koru.\n"
+        "Güven Politikası:\n"
+        "  - Regex+OCR teyidi varsa ≥0.9.\n"
+        "  - Bağlamla desteklenen ancak zayıf kanıtlı sonuçlar 0.4-0.7.\n"
+        "  - Emin değilsen 0.3 altı ve gerekirse null.\n"
+        "Deterministik Ayarlar:\n"
+        "  - Metinde olmayan bilgiyi uydurma.\n"
+        "  - Tüm alanları JSON şemasında sırayla döndür, anahtar adlarını değiştirme.\n"
+        "  - Kaynak açıklamalarını kısa ve kanıt gösterir şekilde yaz."
+    )
+    _OUTPUT_SCHEMA_JSON = json.dumps(
+        {
+            "mappings": {
+                "ALAN_ADI": {
+                    "value": None,
+                    "confidence": 0.0,
+                    "source": ""
+                }
+            },
+            "overall_confidence": 0.0
+        },
+        ensure_ascii=False,
+        separators=(',', ':'),
+    )
+    _PROMPT_PREAMBLE = (
+        "Aşağıdaki OCR metni bir belgeden çıkarılmıştır."
+        " Sistem talimatlarına sıkı sıkıya bağlı kalarak alan değerlerini belirle."
+    )
+    _OUTPUT_SCHEMA_SECTION = "\nÇIKTI ŞEMASI (örnek):\n" + _OUTPUT_SCHEMA_JSON
+    _RESPONSE_FORMAT_SECTION = (
+        "\nYANIT FORMATIN:\n"
+        "Yanıtını yalnızca geçerli JSON ile ver."
+    )
+    # Shared by every request; DataMasker returns copies, so it is never mutated.
+    # It carries every byte that is identical across documents and templates,
+    # which makes it the start of the prefix OpenAI caches between calls.
+    _SYSTEM_MESSAGE: Dict[str, str] = {
+        "role": "system",
+        "content": (
+            "Sen bir belge analiz uzmanısın. Görevin, OCR ile çıkarılan metinden "
+            "belirli alanları tespit etmek ve değerlerini bulmaktır. Sadece geçerli "
+            "JSON döndür. Açıklama, başlık, markdown veya code fence ekleme. Türkçe "
+            "karakterleri doğru tanı."
+            "\n\nTALİMAT SETİ:\n" + _INSTRUCTION_BLOCK + "\n" + _OUTPUT_SCHEMA_SECTION
+        ),
+    }
+
     def __init__(
         self,
         api_key: str,
@@ -40,6 +390,7 @@ class AIFieldMapper:
         *,
         temperature: Optional[float] = None,
         context_window: Optional[int] = None,
+        stream: bool = True,
     ):
         """
         Initialize AI field mapper
@@ -47,9 +398,12 @@ class AIFieldMapper:
         Args:
             api_key: OpenAI API key
             model: Model name (default: gpt-4o)
+            stream: Stream chat completions and stop reading once the JSON
+                object is complete
         """
         self.api_key = api_key
         self.model = model
+        self.stream = stream
         self.temperature = (
             settings.AI_PRIMARY_TEMPERATURE if temperature is None else temperature
         )
@@ -59,18 +413,42 @@ class AIFieldMapper:
             else context_window
         )
         self._has_valid_api_key = bool(api_key and api_key.strip())
+        # Request parameters per (model, token limit); the inputs are fixed
+        # after init.
+        self._options_by_model: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        # (template_fields, len, specs) of the last template seen; batches map
+        # many documents against the same field list.
+        self._last_field_specs: Optional[
+            Tuple[List[Dict[str, Any]], int, List[_FieldSpec]]
+        ] = None
+        # (ocr_data, sources, word map) of the last OCR payload scored; the
+        # light-model retry and re-scoring merge against the same payload.
+        self._last_word_map: Optional[
+            Tuple[Dict[str, Any], Tuple[Any, Any], Dict[str, float]]
+        ] = None
+        self._is_reasoning_model = self._request_options()["is_reasoning_model"]
 
         self._client = None
+        self._async_client = None
         self._responses_accepts_response_format = False
         self._chat_accepts_response_format = False
+        # Whether chat.completions.create takes stream_options (SDK >= 1.26).
+        self._chat_accepts_stream_options = False
+        # True when every mapping request goes out in JSON mode, so replies
+        # can be decoded directly without the fence/extraction fallbacks.
+        self._provider_guarantees_json = False
         if self._has_valid_api_key:
-            if OpenAI is not None:
+            # The SDK is only imported once a usable key is configured.
+            sdk = load_openai_sdk()
+            if sdk.OpenAI is not None:
                 # Modern OpenAI client (>=1.0)
-                self._client = OpenAI(api_key=api_key)
+                self._client = get_openai_client(api_key, sdk.OpenAI)
                 self._refresh_response_format_support()
-            else:
+            elif sdk.module is not None:
                 # Legacy client (<1.0)
-                openai.api_key = api_key
+                configure_legacy_openai(sdk.module, api_key)
+            else:
+                self._has_valid_api_key = False
 
         if not self._has_valid_api_key:
             logger.error(
@@ -102,139 +480,740 @@ class AIFieldMapper:
                 "OpenAI API anahtarı ayarlanmamış veya geçersiz."
             )
 
+        cache_key = self._mapping_cache_key(ocr_text, template_fields, field_hints)
+        cached = self._cached_result(cache_key, template_fields, ocr_data)
+        if cached is not None:
+            return cached
+
         try:
-            logger.info(
-                "AI alan eşleme süreci başladı: field_count=%s, ocr_text_length=%s",
-                len(template_fields),
-                len(ocr_text or "")
+            field_evidence = self._pre_detect_fields(
+                ocr_text, template_fields, field_hints or None
+            )
+            shortcut = self._evidence_only_result(
+                template_fields, field_evidence, ocr_data
+            )
+            if shortcut is not None:
+                return shortcut
+            messages, masker, field_evidence = self._prepare_mapping_messages(
+                ocr_text, template_fields, ocr_data, field_hints, field_evidence
             )
-            # Build prompt for the configured OpenAI model
-            hints = field_hints or {}
-            field_context = [
-                self._build_field_context(
-                    field,
-                    hints.get(field.get('field_name')) if isinstance(field, dict) else None
+            light_model = self._light_model(ocr_text, template_fields)
+            if light_model is not None:
+                result = self._finalize_mapping(
+                    self._request_mapping(
+                        messages,
+                        self._request_options(light_model, len(template_fields)),
+                    ),
+                    masker, template_fields, field_evidence, ocr_data,
+                    cache_key=cache_key,
                 )
-                for field in template_fields
-            ]
-            field_evidence = self._pre_detect_fields(
-                ocr_text,
+                if self._accept_light_result(result, light_model, cache_key):
+                    return result
+
+            return self._finalize_mapping(
+                self._request_mapping(
+                    messages, self._request_options(field_count=len(template_fields))
+                ),
+                masker, template_fields, field_evidence, ocr_data,
+                cache_key=cache_key,
+            )
+
+        except Exception as e:
+            return self._mapping_error_result(e, template_fields)
+
+    def _request_mapping(
+        self, messages: List[Dict[str, Any]], options: Dict[str, Any]
+    ) -> Any:
+        """Send one mapping request through the sync client (or legacy SDK)."""
+
+        model = options["model"]
+        is_reasoning_model = options["is_reasoning_model"]
+        max_completion_tokens = options["max_completion_tokens"]
+        temperature = options["temperature"]
+
+        logger.info("OpenAI API çağrısı hazırlanıyor: model=%s", model)
+        if self._client is not None:
+            if is_reasoning_model:
+                return call_reasoning_model(
+                    self._client,
+                    model=model,
+                    messages=messages,
+                    response_format=self._responses_response_format(options),
+                    temperature=temperature,
+                )
+            return self._collect_chat_stream(
+                self._client.chat.completions.create(
+                    **self._chat_request_kwargs(messages, options)
+                )
+            )
+
+        request_kwargs = {
+            "model": model,
+            "messages": messages,
+        }
+        if temperature is not None:
+            request_kwargs["temperature"] = temperature
+        if (not is_reasoning_model) and max_completion_tokens is not None:
+            request_kwargs["max_tokens"] = max_completion_tokens
+
+        return load_openai_sdk().module.ChatCompletion.create(**request_kwargs)
+
+    async def _request_mapping_async(
+        self,
+        async_client: Any,
+        messages: List[Dict[str, Any]],
+        options: Dict[str, Any],
+    ) -> Any:
+        """Awaitable counterpart of :meth:`_request_mapping`."""
+
+        logger.info("OpenAI API çağrısı hazırlanıyor (async): model=%s", options["model"])
+        if options["is_reasoning_model"]:
+            return await call_reasoning_model(
+                async_client,
+                model=options["model"],
+                messages=messages,
+                response_format=self._responses_response_format(options),
+                temperature=options["temperature"],
+            )
+        return await self._collect_chat_stream_async(
+            await async_client.chat.completions.create(
+                **self._chat_request_kwargs(messages, options)
+            )
+        )
+
+    def _light_model(
+        self, ocr_text: str, template_fields: List[Dict[str, Any]]
+    ) -> Optional[str]:
+        """Return the cheaper model for short, simple documents, if any."""
+
+        light_model = settings.AI_FALLBACK_MODEL
+        if not light_model or light_model == self.model:
+            return None
+        if self._is_reasoning_model:
+            return None
+        if (
+            len(ocr_text or "") >= settings.AI_FALLBACK_MAX_OCR_CHARS
+            or len(template_fields) >= settings.AI_FALLBACK_MAX_FIELDS
+        ):
+            return None
+        return light_model
+
+    def _accept_light_result(
+        self,
+        result: Dict[str, Any],
+        light_model: str,
+        cache_key: Optional[str],
+    ) -> bool:
+        """Decide whether the cheaper model's mapping is good enough to keep."""
+
+        confidence = result.get('overall_confidence') or 0.0
+        accepted = (
+            not result.get('error')
+            and confidence >= settings.AI_FALLBACK_MIN_CONFIDENCE
+        )
+        if not accepted and cache_key is not None:
+            # Never serve the rejected answer from the cache, even if the
+            # primary model fails below.
+            _discard_mapping(cache_key)
+        logger.info(
+            "Hafif model yönlendirmesi: model=%s, güven=%.2f, sonuç=%s",
+            light_model,
+            confidence,
+            "kabul" if accepted else f"{self.model} ile yeniden deneniyor",
+        )
+        return accepted
+
+    async def map_fields_async(
+        self,
+        ocr_text: str,
+        template_fields: List[Dict[str, Any]],
+        ocr_data: Optional[Dict[str, Any]] = None,
+        field_hints: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Awaitable variant of :meth:`map_fields`
+
+        Uses ``AsyncOpenAI`` so the event loop keeps serving other requests
+        while the model answers. Without an async client (legacy SDK) the
+        synchronous call runs in a worker thread instead.
+        """
+        if not self._has_valid_api_key:
+            return self._create_empty_mapping(
                 template_fields,
-                hints if hints else None
+                "OpenAI API anahtarı ayarlanmamış veya geçersiz."
             )
-            prompt = self._build_mapping_prompt(
-                ocr_text,
-                field_context,
-                field_evidence=field_evidence if field_evidence else None,
-                field_hints=self._summarize_field_hints(hints)
+
+        async_client = self._get_async_client()
+        if async_client is None:
+            return await asyncio.to_thread(
+                self.map_fields, ocr_text, template_fields, ocr_data, field_hints
             )
 
-            masker = DataMasker(enabled=settings.DATA_MASKING_ENABLED)
-            prompt_preview = prompt
-            if masker.enabled:
-                prompt_preview = masker.mask_text(prompt) or ""
+        cache_key = self._mapping_cache_key(ocr_text, template_fields, field_hints)
+        cached = self._cached_result(cache_key, template_fields, ocr_data)
+        if cached is not None:
+            return cached
 
-            logger.info(
-                "AI istemci konfigürasyonu hazır: client_type=%s, hints=%s, regex_hits=%s",
-                "modern" if self._client is not None else "legacy",
-                len(hints),
-                len(field_evidence or {})
+        try:
+            field_evidence = self._pre_detect_fields(
+                ocr_text, template_fields, field_hints or None
             )
-            logger.info(
-                "Oluşturulan prompt özeti: uzunluk=%s, ilk_200_karakter=%s",
-                len(prompt),
-                (prompt_preview or "")[:200]
+            shortcut = self._evidence_only_result(
+                template_fields, field_evidence, ocr_data
+            )
+            if shortcut is not None:
+                return shortcut
+            messages, masker, field_evidence = self._prepare_mapping_messages(
+                ocr_text, template_fields, ocr_data, field_hints, field_evidence
+            )
+            light_model = self._light_model(ocr_text, template_fields)
+            if light_model is not None:
+                result = self._finalize_mapping(
+                    await self._request_mapping_async(
+                        async_client,
+                        messages,
+                        self._request_options(light_model, len(template_fields)),
+                    ),
+                    masker, template_fields, field_evidence, ocr_data,
+                    cache_key=cache_key,
+                )
+                if self._accept_light_result(result, light_model, cache_key):
+                    return result
+
+            return self._finalize_mapping(
+                await self._request_mapping_async(
+                    async_client,
+                    messages,
+                    self._request_options(field_count=len(template_fields)),
+                ),
+                masker, template_fields, field_evidence, ocr_data,
+                cache_key=cache_key,
             )
 
-            source = (ocr_data or {}).get('source', 'unknown') if ocr_data else 'unknown'
-            is_reasoning_model = str(self.model).startswith("gpt-5")
-            max_completion_tokens = max(1, int(self.context_window or 2000))
-            temperature = None if is_reasoning_model else self.temperature
-            response_format = {"type": "json_object"}
-            token_limit_for_logging = None if is_reasoning_model else max_completion_tokens
+        except Exception as e:
+            return self._mapping_error_result(e, template_fields)
 
-            logger.info(
-                "AI eşleme çağrısı: model=%s, response_format=%s, token_limit=%s, temperature=%s",
-                self.model,
-                response_format.get('type'),
-                token_limit_for_logging,
-                temperature if temperature is not None else "auto",
+    async def map_many(
+        self,
+        items: Sequence[Tuple[
+            str,
+            List[Dict[str, Any]],
+            Optional[Dict[str, Any]],
+            Optional[Dict[str, Any]],
+        ]],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> List[Dict[str, Any]]:
+        """
+        Map several documents concurrently, at most ``max_concurrency`` at once
+
+        Rate-limit (429) responses are retried with exponential backoff by the
+        OpenAI client itself.
+
+        Args:
+            items: ``(ocr_text, template_fields, ocr_data, field_hints)`` tuples
+
+        Returns:
+            One mapping result per item, in input order
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def _bounded(item: Tuple[Any, ...]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.map_fields_async(*item)
+
+        return list(await asyncio.gather(*(_bounded(item) for item in items)))
+
+    @staticmethod
+    def clear_cache() -> None:
+        """Forget every cached mapping result."""
+
+        with _MAPPING_CACHE_LOCK:
+            _MAPPING_CACHE.clear()
+
+    def _mapping_cache_key(
+        self,
+        ocr_text: str,
+        template_fields: List[Dict[str, Any]],
+        field_hints: Optional[Dict[str, Any]],
+    ) -> Optional[str]:
+        """Stable fingerprint of everything that shapes the model request."""
+
+        options = self._request_options()
+        fingerprint = [
+            self.model,
+            options["temperature"],
+            options["max_completion_tokens"],
+            _cache_text(ocr_text or ""),
+            template_fields,
+            field_hints or {},
+        ]
+        try:
+            if orjson is not None:
+                payload = orjson.dumps(
+                    fingerprint, default=str, option=orjson.OPT_SORT_KEYS
+                )
+            else:
+                payload = json.dumps(
+                    fingerprint, ensure_ascii=False, sort_keys=True, default=str
+                ).encode("utf-8")
+        except (TypeError, ValueError):  # e.g. non-string keys; skip caching
+            return None
+        return hashlib.blake2b(payload, digest_size=20).hexdigest()
+
+    def _cached_result(
+        self,
+        cache_key: Optional[str],
+        template_fields: List[Dict[str, Any]],
+        ocr_data: Optional[Dict[str, Any]],
+    ) -> Optional[Dict[str, Any]]:
+        if cache_key is None:
+            return None
+
+        result = _cached_mapping(cache_key)
+        if result is None:
+            return None
+
+        logger.info("AI eşleme sonucu önbellekten döndürüldü: %s", cache_key[:12])
+        if ocr_data and isinstance(ocr_data, dict):
+            self._merge_ocr_confidence(result, ocr_data, template_fields)
+        return result
+
+    def _get_async_client(self) -> Any:
+        """Return the shared ``AsyncOpenAI`` client, creating it on first use."""
+
+        if self._async_client is None and self._client is not None:
+            async_cls = load_openai_sdk().AsyncOpenAI
+            if async_cls is not None:
+                self._async_client = get_openai_client(self.api_key, async_cls)
+        return self._async_client
+
+    def _responses_response_format(
+        self, options: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        response_format = options["response_format"]
+        if response_format and self._responses_accepts_response_format:
+            return response_format
+        if response_format:
+            logger.debug(
+                "response_format desteği olmayan Responses.create kullanımı tespit edildi"
             )
-            logger.info("OCR kaynağı: %s", source)
+        return None
+
+    def _chat_request_kwargs(
+        self, messages: List[Dict[str, Any]], options: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Keyword arguments for ``chat.completions.create``."""
+
+        request_kwargs: Dict[str, Any] = {
+            "model": options["model"],
+            "messages": messages,
+        }
+        if options["temperature"] is not None:
+            request_kwargs["temperature"] = options["temperature"]
+        if options["response_format"] and self._chat_accepts_response_format:
+            request_kwargs["response_format"] = options["response_format"]
+        else:
             logger.debug(
-                "Regex ön bulgusu olan alan sayısı: %s, field hint alan sayısı: %s",
-                len(field_evidence or {}),
-                len(hints),
+                "response_format desteği olmayan ChatCompletions.create kullanımı tespit edildi"
             )
+        if options["max_completion_tokens"] is not None:
+            request_kwargs["max_completion_tokens"] = options["max_completion_tokens"]
+        if self.stream:
+            request_kwargs["stream"] = True
+            if self._wants_stream_usage():
+                request_kwargs["stream_options"] = {"include_usage": True}
+        return request_kwargs
 
-            # Call OpenAI API (supports both legacy and modern clients)
-            messages = [
-                {
-                    "role": "system",
-                    "content": (
-                        "Sen bir belge analiz uzmanısın. Görevin, OCR ile çıkarılan metinden "
-                        "belirli alanları tespit etmek ve değerlerini bulmaktır. Sadece geçerli "
-                        "JSON döndür. Açıklama, başlık, markdown veya code fence ekleme. Türkçe "
-                        "karakterleri doğru tanı."
-                    )
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
+    def _wants_stream_usage(self) -> bool:
+        """Whether streamed replies should carry token usage for the cache log."""
+
+        return self._chat_accepts_stream_options and logger.isEnabledFor(logging.INFO)
+
+    @staticmethod
+    def _is_chat_stream(response: Any) -> bool:
+        # Non-streaming responses (and test doubles) already carry choices.
+        return not (
+            isinstance(response, dict) or getattr(response, "choices", None) is not None
+        )
+
+    @staticmethod
+    def _stream_delta(chunk: Any) -> str:
+        choices = getattr(chunk, "choices", None) or []
+        if not choices:
+            return ""
+        delta = getattr(choices[0], "delta", None)
+        return getattr(delta, "content", None) or ""
+
+    @staticmethod
+    def _streamed_response(text: str, usage: Any = None) -> Dict[str, Any]:
+        response: Dict[str, Any] = {"choices": [{"message": {"content": text}}]}
+        if usage is not None:
+            response["usage"] = usage
+        return response
+
+    def _collect_chat_stream(self, response: Any) -> Any:
+        """Read a streamed chat completion until its JSON object closes.
+
+        When usage was requested the rest of the stream is drained as well,
+        since the usage chunk only arrives after the last content delta.
+        """
+
+        if not self._is_chat_stream(response):
+            return response
+
+        collector = _JsonObjectCollector()
+        drain = self._wants_stream_usage()
+        complete = False
+        usage = None
+        try:
+            for chunk in response:
+                usage = getattr(chunk, "usage", None) or usage
+                if complete:
+                    continue
+                if collector.feed(self._stream_delta(chunk)):
+                    complete = True
+                    if not drain:
+                        break
+        finally:
+            close = getattr(response, "close", None)
+            if callable(close):
+                close()
+        return self._streamed_response(collector.text, usage)
+
+    async def _collect_chat_stream_async(self, response: Any) -> Any:
+        """Async counterpart of :meth:`_collect_chat_stream`."""
+
+        if not self._is_chat_stream(response):
+            return response
+
+        collector = _JsonObjectCollector()
+        drain = self._wants_stream_usage()
+        complete = False
+        usage = None
+        try:
+            async for chunk in response:
+                usage = getattr(chunk, "usage", None) or usage
+                if complete:
+                    continue
+                if collector.feed(self._stream_delta(chunk)):
+                    complete = True
+                    if not drain:
+                        break
+        finally:
+            close = getattr(response, "close", None)
+            if callable(close):
+                await close()
+        return self._streamed_response(collector.text, usage)
+
+    def _mapping_error_result(
+        self, error: Exception, template_fields: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Log ``error`` and return the empty mapping reported to callers."""
+
+        sdk = load_openai_sdk()
+        if isinstance(error, sdk.AuthenticationError):
+            logger.error("OpenAI API kimlik doğrulama hatası: %s", str(error))
+            return self._create_empty_mapping(
+                template_fields,
+                "OpenAI API anahtarı doğrulanamadı"
+            )
+        if isinstance(error, sdk.OpenAIError):
+            logger.error("OpenAI API hatası: %s", str(error))
+            return self._create_empty_mapping(template_fields, str(error))
+
+        raw_error = str(error)
+        user_friendly_error = raw_error
+        if 'field_hints' in raw_error and '_build_mapping_prompt' in raw_error:
+            user_friendly_error = 'field_hints parametresi uyumsuz. Lütfen tekrar deneyin.'
+
+        logger.error(f"AI haritalama hatası: {raw_error}")
+        # Return empty mappings with low confidence
+        return self._create_empty_mapping(template_fields, user_friendly_error)
+
+    def map_fields_batch(
+        self,
+        items: Sequence[Tuple[
+            str,
+            List[Dict[str, Any]],
+            Optional[Dict[str, Any]],
+            Optional[Dict[str, Any]],
+        ]],
+        *,
+        poll_interval: float = BATCH_POLL_INTERVAL_SECONDS,
+        timeout: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Map many documents through the OpenAI Batch API
+
+        Batch jobs cost half as much as synchronous calls but may take up to
+        24 hours, so use this only for bulk runs that are not latency
+        sensitive. Falls back to sequential ``map_fields`` calls when the
+        client has no Batch API (legacy SDK).
+
+        Args:
+            items: ``(ocr_text, template_fields, ocr_data, field_hints)`` tuples
+            poll_interval: Seconds between batch status checks
+            timeout: Give up waiting after this many seconds (``None``: wait)
+
+        Returns:
+            One mapping result per item, in input order
+        """
+        if not items:
+            return []
+
+        if not self._has_valid_api_key:
+            return [
+                self._create_empty_mapping(
+                    template_fields,
+                    "OpenAI API anahtarı ayarlanmamış veya geçersiz."
+                )
+                for _, template_fields, _, _ in items
             ]
 
-            if masker.enabled:
-                messages = masker.mask_messages(messages)
+        if self._client is None or getattr(self._client, "batches", None) is None:
+            logger.info("Batch API kullanılamıyor, belgeler sırayla eşlenecek")
+            return [self.map_fields(*item) for item in items]
 
-            logger.info("OpenAI API çağrısı hazırlanıyor...")
-            if self._client is not None:
-                self._refresh_response_format_support()
-                if is_reasoning_model:
-                    responses_response_format = None
-                    if response_format and self._responses_accepts_response_format:
-                        responses_response_format = response_format
-                    elif response_format:
-                        logger.debug(
-                            "response_format desteği olmayan Responses.create kullanımı tespit edildi"
-                        )
-
-                    response = call_reasoning_model(
-                        self._client,
-                        model=self.model,
-                        messages=messages,
-                        response_format=responses_response_format,
-                        temperature=temperature,
+        prepared: List[Tuple[DataMasker, Dict[str, Any]]] = []
+        lines: List[str] = []
+        endpoint = (
+            "/v1/responses"
+            if self._is_reasoning_model
+            else "/v1/chat/completions"
+        )
+        for index, (ocr_text, template_fields, ocr_data, field_hints) in enumerate(items):
+            messages, masker, field_evidence = self._prepare_mapping_messages(
+                ocr_text, template_fields, ocr_data, field_hints
+            )
+            prepared.append((masker, field_evidence))
+            lines.append(_compact_json({
+                "custom_id": str(index),
+                "method": "POST",
+                "url": endpoint,
+                "body": self._batch_request_body(messages, len(template_fields)),
+            }))
+
+        try:
+            input_file = self._client.files.create(
+                file=("mapping_batch.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch",
+            )
+            batch = self._client.batches.create(
+                input_file_id=input_file.id,
+                endpoint=endpoint,
+                completion_window="24h",
+            )
+            logger.info(
+                "OpenAI batch işi oluşturuldu: batch_id=%s, belge_sayısı=%s",
+                batch.id,
+                len(items),
+            )
+
+            started = time.monotonic()
+            while batch.status not in BATCH_TERMINAL_STATUSES:
+                if timeout is not None and time.monotonic() - started > timeout:
+                    raise TimeoutError(
+                        f"OpenAI batch işi zaman aşımına uğradı: {batch.id}"
                     )
-                else:
-                    request_kwargs = {
-                        "model": self.model,
-                        "messages": messages,
-                    }
-                    if temperature is not None:
-                        request_kwargs["temperature"] = temperature
-                    if response_format and self._chat_accepts_response_format:
-                        request_kwargs["response_format"] = response_format
-                    else:
-                        logger.debug(
-                            "response_format desteği olmayan ChatCompletions.create kullanımı tespit edildi"
-                        )
-                    if max_completion_tokens is not None:
-                        request_kwargs["max_completion_tokens"] = max_completion_tokens
+                time.sleep(poll_interval)
+                batch = self._client.batches.retrieve(batch.id)
 
-                    response = self._client.chat.completions.create(**request_kwargs)
-            else:
-                request_kwargs = {
-                    "model": self.model,
-                    "messages": messages,
-                }
-                if temperature is not None:
-                    request_kwargs["temperature"] = temperature
-                if (not is_reasoning_model) and max_completion_tokens is not None:
-                    request_kwargs["max_tokens"] = max_completion_tokens
+            if batch.status != "completed" or not batch.output_file_id:
+                raise load_openai_sdk().OpenAIError(
+                    f"OpenAI batch işi tamamlanamadı: {batch.id} ({batch.status})"
+                )
+
+            output = self._client.files.content(batch.output_file_id).text
+        except Exception as e:
+            logger.error("OpenAI batch hatası: %s", str(e))
+            return [
+                self._create_empty_mapping(template_fields, str(e))
+                for _, template_fields, _, _ in items
+            ]
+
+        responses: Dict[str, Any] = {}
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            record = loads_json(line)
+            responses[record.get("custom_id")] = record
+
+        results: List[Dict[str, Any]] = []
+        for index, (_, template_fields, ocr_data, _) in enumerate(items):
+            record = responses.get(str(index)) or {}
+            body = (record.get("response") or {}).get("body")
+            if record.get("error") or body is None:
+                error = record.get("error") or "OpenAI batch yanıtı bulunamadı"
+                logger.error("OpenAI batch öğesi başarısız: index=%s, hata=%s", index, error)
+                results.append(self._create_empty_mapping(template_fields, str(error)))
+                continue
+
+            masker, field_evidence = prepared[index]
+            try:
+                results.append(self._finalize_mapping(
+                    body, masker, template_fields, field_evidence, ocr_data
+                ))
+            except Exception as e:
+                logger.error(f"AI haritalama hatası: {e}")
+                results.append(self._create_empty_mapping(template_fields, str(e)))
+
+        return results
+
+    def _request_options(
+        self, model: Optional[str] = None, field_count: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Model-dependent request parameters shared by sync and batch calls.
+
+        With ``field_count`` the completion budget of chat models is sized to
+        the template. Computed once per (model, budget) and shared between
+        requests; treat as read-only.
+        """
+
+        model = model or self.model
+        is_reasoning_model = str(model).startswith("gpt-5")
+        token_limit = max(1, int(self.context_window or 2000))
+        if field_count and not is_reasoning_model:
+            token_limit = min(
+                token_limit,
+                max(
+                    MAPPING_MIN_COMPLETION_TOKENS,
+                    MAPPING_BASE_COMPLETION_TOKENS
+                    + MAPPING_TOKENS_PER_FIELD * field_count,
+                ),
+            )
+
+        options = self._options_by_model.get((model, token_limit))
+        if options is None:
+            options = {
+                "model": model,
+                "is_reasoning_model": is_reasoning_model,
+                "max_completion_tokens": token_limit,
+                "temperature": None if is_reasoning_model else self.temperature,
+                "response_format": _JSON_OBJECT_FORMAT,
+            }
+            self._options_by_model[(model, token_limit)] = options
+        return options
+
+    def _prepare_mapping_messages(
+        self,
+        ocr_text: str,
+        template_fields: List[Dict[str, Any]],
+        ocr_data: Optional[Dict[str, Any]],
+        field_hints: Optional[Dict[str, Any]],
+        field_evidence: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], DataMasker, Dict[str, Any]]:
+        """Build the (masked) chat messages for one document.
+
+        ``field_evidence`` is reused when the caller already ran
+        :meth:`_pre_detect_fields`.
+        """
+
+        logger.info(
+            "AI alan eşleme süreci başladı: field_count=%s, ocr_text_length=%s",
+            len(template_fields),
+            len(ocr_text or "")
+        )
+        # Build prompt for the configured OpenAI model
+        hints = field_hints or {}
+        field_context = self._build_field_contexts(template_fields, hints)
+        if field_evidence is None:
+            field_evidence = self._pre_detect_fields(
+                ocr_text,
+                template_fields,
+                hints if hints else None
+            )
+        prompt = self._build_mapping_prompt(
+            ocr_text,
+            field_context,
+            field_evidence=field_evidence if field_evidence else None,
+            field_hints=self._summarize_field_hints(hints)
+        )
+
+        masker = DataMasker(enabled=settings.DATA_MASKING_ENABLED)
+
+        # Messages for the OpenAI API (legacy and modern clients alike)
+        messages = [
+            self._SYSTEM_MESSAGE,
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+
+        if masker.enabled:
+            messages = masker.mask_messages(messages)
+
+        logger.info(
+            "AI istemci konfigürasyonu hazır: client_type=%s, hints=%s, regex_hits=%s",
+            "modern" if self._client is not None else "legacy",
+            len(hints),
+            len(field_evidence or {})
+        )
+        if logger.isEnabledFor(logging.INFO):
+            # The user message is already masked, so the preview costs no
+            # extra DataMasker pass over the OCR text.
+            logger.info(
+                "Oluşturulan prompt özeti: uzunluk=%s, ilk_200_karakter=%s",
+                len(prompt),
+                (messages[1]["content"] or "")[:200]
+            )
+
+        source = (ocr_data or {}).get('source', 'unknown') if ocr_data else 'unknown'
+        options = self._request_options(field_count=len(template_fields))
+        temperature = options["temperature"]
+
+        logger.info(
+            "AI eşleme çağrısı: model=%s, response_format=%s, token_limit=%s, temperature=%s",
+            self.model,
+            options["response_format"].get('type'),
+            None if options["is_reasoning_model"] else options["max_completion_tokens"],
+            temperature if temperature is not None else "auto",
+        )
+        logger.info("OCR kaynağı: %s", source)
+        logger.debug(
+            "Regex ön bulgusu olan alan sayısı: %s, field hint alan sayısı: %s",
+            len(field_evidence or {}),
+            len(hints),
+        )
+
+        return messages, masker, field_evidence
+
+    def _batch_request_body(
+        self, messages: List[Dict[str, Any]], field_count: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Return the JSON body of one Batch API request line."""
+
+        options = self._request_options(field_count=field_count)
+        if options["is_reasoning_model"]:
+            return build_reasoning_request(
+                model=self.model,
+                messages=messages,
+                response_format=options["response_format"],
+            )
 
-                response = openai.ChatCompletion.create(**request_kwargs)
+        body: Dict[str, Any] = {
+            "model": self.model,
+            "messages": messages,
+            "response_format": options["response_format"],
+            "max_completion_tokens": options["max_completion_tokens"],
+        }
+        if options["temperature"] is not None:
+            body["temperature"] = options["temperature"]
+        return body
 
+    def _finalize_mapping(
+        self,
+        response: Any,
+        masker: DataMasker,
+        template_fields: List[Dict[str, Any]],
+        field_evidence: Dict[str, Any],
+        ocr_data: Optional[Dict[str, Any]],
+        *,
+        cache_key: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Turn an OpenAI response into the unmasked field mapping result."""
+
+        if logger.isEnabledFor(logging.INFO):
             logger.info(
                 "OpenAI yanıtı alındı: response_type=%s, has_choices=%s",
                 type(response).__name__,
@@ -242,67 +1221,55 @@ class AIFieldMapper:
                     isinstance(response, dict) and response.get('choices')
                 ))
             )
+            self._log_prompt_cache_usage(response)
+        if logger.isEnabledFor(logging.DEBUG):
             logger.debug(
                 "OpenAI yanıtı ham veri özeti: %s",
                 self._safe_dump_response(response)
             )
 
-            raw_ai_message = self._extract_ai_message(response)
+        raw_ai_message = self._extract_ai_message(response)
 
-            if not raw_ai_message:
-                logger.error("OpenAI'den boş yanıt alındı")
-                logger.error(
-                    "Boş yanıt hatası için OpenAI response içeriği: %s",
-                    self._safe_dump_response(response)
-                )
-                return self._create_empty_mapping(
-                    template_fields,
-                    "OpenAI'den geçerli yanıt alınamadı"
-                )
+        if not raw_ai_message:
+            logger.error("OpenAI'den boş yanıt alındı")
+            logger.error(
+                "Boş yanıt hatası için OpenAI response içeriği: %s",
+                self._safe_dump_response(response)
+            )
+            return self._create_empty_mapping(
+                template_fields,
+                "OpenAI'den geçerli yanıt alınamadı"
+            )
 
+        if logger.isEnabledFor(logging.DEBUG):
             logger.debug(
                 "AI ham yanıtı (ilk 1000 karakter): %s",
-                raw_ai_message[:1000]
+                str(raw_ai_message)[:1000]
             )
 
-            ai_message = masker.unmask_text(raw_ai_message)
-
-            # Parse response
-            result = self._parse_ai_response(
-                ai_message,
-                template_fields,
-                field_evidence=field_evidence
-            )
+        # Structured payloads arrive as dicts and skip the string round trip.
+        ai_message = masker.unmask_structure(raw_ai_message)
 
-            result = masker.unmask_structure(result)
+        # Parse response
+        result = self._parse_ai_response(
+            ai_message,
+            template_fields,
+            field_evidence=field_evidence
+        )
 
-            if ocr_data and isinstance(ocr_data, dict):
-                self._merge_ocr_confidence(result, ocr_data, template_fields)
+        result = masker.unmask_structure(result)
 
-            logger.info(
-                "AI haritalama tamamlandı: %s alan",
-                len(result.get('field_mappings', {}))
-            )
-            return result
+        if cache_key is not None and not result.get('error'):
+            _store_mapping(cache_key, result)
 
-        except AuthenticationError as e:
-            logger.error("OpenAI API kimlik doğrulama hatası: %s", str(e))
-            return self._create_empty_mapping(
-                template_fields,
-                "OpenAI API anahtarı doğrulanamadı"
-            )
-        except OpenAIError as e:
-            logger.error("OpenAI API hatası: %s", str(e))
-            return self._create_empty_mapping(template_fields, str(e))
-        except Exception as e:
-            raw_error = str(e)
-            user_friendly_error = raw_error
-            if 'field_hints' in raw_error and '_build_mapping_prompt' in raw_error:
-                user_friendly_error = 'field_hints parametresi uyumsuz. Lütfen tekrar deneyin.'
+        if ocr_data and isinstance(ocr_data, dict):
+            self._merge_ocr_confidence(result, ocr_data, template_fields)
 
-            logger.error(f"AI haritalama hatası: {raw_error}")
-            # Return empty mappings with low confidence
-            return self._create_empty_mapping(template_fields, user_friendly_error)
+        logger.info(
+            "AI haritalama tamamlandı: %s alan",
+            len(result.get('field_mappings', {}))
+        )
+        return result
 
     @staticmethod
     def _supports_kwarg(method: Any, keyword: str) -> bool:
@@ -311,37 +1278,89 @@ class AIFieldMapper:
         if method is None:
             return False
 
+        # Bound methods are rebuilt on every attribute access; the underlying
+        # function is stable, so memoize on that instead.
+        function = getattr(method, "__func__", method)
         try:
-            signature = inspect.signature(method)
-        except (TypeError, ValueError):  # pragma: no cover - fall back safely
-            return False
-
-        for parameter in signature.parameters.values():
-            if parameter.kind == inspect.Parameter.VAR_KEYWORD:
-                return True
-
-        return keyword in signature.parameters
+            return _function_accepts_kwarg(function, keyword)
+        except TypeError:  # pragma: no cover - unhashable callable
+            return _signature_accepts_kwarg(method, keyword)
 
     def _refresh_response_format_support(self) -> None:
         """Recalculate response_format support flags for the current client."""
 
         self._responses_accepts_response_format = False
         self._chat_accepts_response_format = False
+        self._chat_accepts_stream_options = False
+        self._provider_guarantees_json = False
 
         if self._client is None:
             return
 
-        responses_create = getattr(getattr(self._client, "responses", None), "create", None)
-        self._responses_accepts_response_format = self._supports_kwarg(
-            responses_create,
-            "response_format",
+        try:
+            support = _RESPONSE_FORMAT_SUPPORT.get(self._client)
+        except TypeError:  # pragma: no cover - client cannot be weakly referenced
+            support = None
+
+        if support is None:
+            responses_create = getattr(
+                getattr(self._client, "responses", None), "create", None
+            )
+            chat_completions = getattr(
+                getattr(self._client, "chat", None), "completions", None
+            )
+            chat_create = getattr(chat_completions, "create", None)
+            support = (
+                self._supports_kwarg(responses_create, "response_format"),
+                self._supports_kwarg(chat_create, "response_format"),
+                self._supports_kwarg(chat_create, "stream_options"),
+            )
+            try:
+                _RESPONSE_FORMAT_SUPPORT[self._client] = support
+            except TypeError:  # pragma: no cover - client cannot be weakly referenced
+                pass
+
+        (
+            self._responses_accepts_response_format,
+            self._chat_accepts_response_format,
+            self._chat_accepts_stream_options,
+        ) = support
+        # Reasoning models go through Responses, everything else through chat.
+        self._provider_guarantees_json = (
+            self._responses_accepts_response_format
+            if self._is_reasoning_model
+            else self._chat_accepts_response_format
         )
 
-        chat_completions = getattr(getattr(self._client, "chat", None), "completions", None)
-        chat_create = getattr(chat_completions, "create", None)
-        self._chat_accepts_response_format = self._supports_kwarg(
-            chat_create,
-            "response_format",
+    @staticmethod
+    def _log_prompt_cache_usage(response: Any) -> None:
+        """Log how many prompt tokens OpenAI served from its prefix cache."""
+
+        usage = getattr(response, "usage", None)
+        if usage is None and isinstance(response, dict):
+            usage = response.get("usage")
+        if usage is None:
+            return
+
+        def _read(source: Any, key: str) -> Any:
+            if isinstance(source, dict):
+                return source.get(key)
+            return getattr(source, key, None)
+
+        # Chat Completions and Responses name the same counters differently.
+        prompt_tokens = _read(usage, "prompt_tokens") or _read(usage, "input_tokens")
+        details = _read(usage, "prompt_tokens_details") or _read(
+            usage, "input_tokens_details"
+        )
+        cached_tokens = (
+            _read(details, "cached_tokens") if details is not None else None
+        ) or 0
+
+        logger.info(
+            "Prompt önbellek kullanımı: prompt_tokens=%s, cached_tokens=%s, isabet=%.0f%%",
+            prompt_tokens,
+            cached_tokens,
+            100.0 * cached_tokens / prompt_tokens if prompt_tokens else 0.0,
         )
 
     @staticmethod
@@ -351,29 +1370,27 @@ class AIFieldMapper:
         if response is None:
             return "<empty response>"
 
-        try:
-            model_dump = getattr(response, "model_dump", None)
-            if callable(model_dump):
-                dumped = model_dump()
-                return json.dumps(dumped, ensure_ascii=False, default=str)[:4000]
-        except Exception as exc:  # pragma: no cover - defensive logging path
-            logger.debug("OpenAI yanıtı model_dump sırasında hata: %s", exc)
+        # Modern SDK responses are Pydantic models that serialize themselves;
+        # default=str covers everything else without a __dict__ retry.
+        model_dump_json = getattr(response, "model_dump_json", None)
+        if callable(model_dump_json):
+            try:
+                return model_dump_json()[:4000]
+            except Exception as exc:  # pragma: no cover - defensive logging path
+                logger.debug("OpenAI yanıtı model_dump_json sırasında hata: %s", exc)
 
         try:
-            return json.dumps(response, ensure_ascii=False, default=str)[:4000]
+            return _compact_json(response, default=str)[:4000]
         except TypeError:
-            try:
-                response_dict = getattr(response, "__dict__", None)
-                if response_dict:
-                    return json.dumps(response_dict, ensure_ascii=False, default=str)[:4000]
-            except Exception:  # pragma: no cover - defensive
-                pass
-
-        return repr(response)[:4000]
+            return repr(response)[:4000]
 
     @staticmethod
-    def _extract_ai_message(response: Any) -> Optional[str]:
-        """Return the textual message content from an OpenAI response."""
+    def _extract_ai_message(response: Any) -> Union[str, Dict[str, Any], None]:
+        """Return the message content from an OpenAI response.
+
+        Structured outputs (``parsed`` or a single ``json`` content part) are
+        returned as the dict itself so they need not be re-serialized.
+        """
 
         if response is None:
             logger.info("_extract_ai_message: response nesnesi None geldi")
@@ -426,9 +1443,11 @@ class AIFieldMapper:
 
         if parsed is not None:
             logger.info("_extract_ai_message: parsed içerik bulundu, tip=%s", type(parsed).__name__)
-            if isinstance(parsed, (dict, list)):
+            if isinstance(parsed, dict):
+                return parsed
+            if isinstance(parsed, list):
                 try:
-                    return json.dumps(parsed, ensure_ascii=False)
+                    return _compact_json(parsed)
                 except TypeError:
                     return str(parsed)
             return str(parsed)
@@ -443,48 +1462,34 @@ class AIFieldMapper:
 
         if isinstance(content, list):
             logger.info("_extract_ai_message: content list olarak bulundu (öğe_sayısı=%s)", len(content))
-            parts: List[str] = []
+            parts: List[Any] = []
             for item in content:
                 if isinstance(item, str):
                     parts.append(item)
                     continue
 
-                item_dict: Optional[Dict[str, Any]] = None
                 if isinstance(item, dict):
-                    item_dict = item
+                    text = item.get('text')
+                    json_payload = item.get('json')
                 else:
-                    item_dict = getattr(item, 'model_dump', None)
-                    if callable(item_dict):
-                        try:
-                            item_dict = item.model_dump()
-                        except Exception:  # pragma: no cover - defensive
-                            item_dict = None
-                    if item_dict is None:
-                        try:
-                            item_dict = dict(item)
-                        except Exception:  # pragma: no cover - defensive
-                            item_dict = None
-
-                if item_dict:
-                    text = item_dict.get('text')
-                    if text:
-                        parts.append(str(text))
-                        continue
-
-                    json_payload = item_dict.get('json')
-                    if json_payload is not None:
-                        try:
-                            parts.append(json.dumps(json_payload, ensure_ascii=False))
-                        except TypeError:
-                            parts.append(str(json_payload))
-                        continue
-
-                text_attr = getattr(item, 'text', None)
-                if text_attr:
-                    parts.append(str(text_attr))
-
+                    text = getattr(item, 'text', None)
+                    json_payload = getattr(item, 'json', None)
+                    if callable(json_payload):
+                        # Pydantic's deprecated .json() method, not a payload.
+                        json_payload = None
+
+                if text:
+                    parts.append(str(text))
+                elif json_payload is not None:
+                    parts.append(json_payload)
+
+            if len(parts) == 1 and isinstance(parts[0], dict):
+                return parts[0]
             if parts:
-                return ''.join(parts).strip()
+                return ''.join(
+                    part if isinstance(part, str) else _compact_json(part, default=str)
+                    for part in parts
+                ).strip()
             return None
 
         if content is not None:
@@ -518,77 +1523,48 @@ class AIFieldMapper:
         if template_fields and all('name' in field for field in template_fields):
             field_context = template_fields
         else:
-            field_context = [self._build_field_context(field) for field in template_fields]
-
-        instruction_block = (
-            "Amaç: OCR çıktısından hedef alan değerlerini tespit etmek, verilen "
-            "kısıtları uygulamak ve normalize edilmiş JSON yanıtı üretmek.\n"
-            "Öncelik Hiyerarşisi:\n"
-            "  1. Regex ipuçları ve ROI/PSM eşleşmeleriyle doğrulanmış sonuçlar.\n"
-            "  2. Aynı satır/sütun bağlamındaki açık metin eşleşmeleri.\n"
-            "  3. Destekleyici kanıtı olan çıkarımlar.\n"
-            "  4. Kanıt yoksa değeri null döndür.\n"
-            "Normalizasyon Kuralları:\n"
-            "  - Tarihler: DD.MM.YYYY veya DD/MM/YYYY, gün ve ay iki haneli.\n"
-            "  - Sayılar: Binlik ayracı nokta, ondalık virgül (ör: 1.234,56).\n"
-            "  - Metinler: Baş/son boşlukları temizle, Türkçe karakterleri koru.\n"
-            "Güven Politikası:\n"
-            "  - Regex+OCR teyidi varsa ≥0.9.\n"
-            "  - Bağlamla desteklenen ancak zayıf kanıtlı sonuçlar 0.4-0.7.\n"
-            "  - Emin değilsen 0.3 altı ve gerekirse null.\n"
-            "Deterministik Ayarlar:\n"
-            "  - Metinde olmayan bilgiyi uydurma.\n"
-            "  - Tüm alanları JSON şemasında sırayla döndür, anahtar adlarını değiştirme.\n"
-            "  - Kaynak açıklamalarını kısa ve kanıt gösterir şekilde yaz."
-        )
-
-        output_schema = {
-            "mappings": {
-                "ALAN_ADI": {
-                    "value": None,
-                    "confidence": 0.0,
-                    "source": ""
-                }
-            },
-            "overall_confidence": 0.0
-        }
+            field_context = self._build_field_contexts(template_fields, {})
 
+        # The static instructions live in the system message; here the
+        # per-template sections come first and document-specific ones last,
+        # so repeated templates extend the cached prefix into this message.
         prompt_sections = [
-            "Aşağıdaki OCR metni bir belgeden çıkarılmıştır."
-            " Talimatlara sıkı sıkıya bağlı kalarak alan değerlerini belirle.",
-            "\nTALİMAT SETİ:\n" + instruction_block,
-            "\nALAN METAVERİSİ:\n" + json.dumps(
-                field_context, ensure_ascii=False, indent=2
-            )
+            self._PROMPT_PREAMBLE,
+            "\nALAN METAVERİSİ:\n" + _compact_json(field_context),
         ]
 
         if merged_hints:
             prompt_sections.append(
-                "\nALAN KURALLARI:\n" + json.dumps(
-                    merged_hints, ensure_ascii=False, indent=2
-                )
+                "\nALAN KURALLARI:\n" + _compact_json(merged_hints)
             )
 
-        prompt_sections.extend([
-            "\nÇIKTI ŞEMASI (örnek):\n" + json.dumps(
-                output_schema, ensure_ascii=False, separators=(',', ':')
-            ),
-            "\nOCR METNİ:\n" + ocr_text,
-            (
-                "\nYANIT FORMATIN:\n"
-                "Yanıtını yalnızca geçerli JSON ile ver."
-            )
-        ])
+        prompt_sections.append("\nOCR METNİ:\n" + ocr_text)
 
         if field_evidence:
             prompt_sections.append(
-                "\nÖN BULGULAR (Regex/Heuristik):\n" + json.dumps(
-                    field_evidence, ensure_ascii=False, indent=2
-                )
+                "\nÖN BULGULAR (Regex/Heuristik):\n" + _compact_json(field_evidence)
             )
 
+        prompt_sections.append(self._RESPONSE_FORMAT_SECTION)
+
         return "\n".join(prompt_sections)
 
+    def _build_field_contexts(
+        self,
+        template_fields: List[Dict[str, Any]],
+        hints: Dict[str, Any],
+    ) -> List[Dict[str, Any]]:
+        """Build the prompt context of every template field."""
+
+        build = self._build_field_context
+        if not hints:
+            return [build(field) for field in template_fields]
+        hint_for = hints.get
+        return [
+            build(field, hint_for(field.get('field_name')) if isinstance(field, dict) else None)
+            for field in template_fields
+        ]
+
     def _build_field_context(
         self,
         field: Dict[str, Any],
@@ -596,23 +1572,24 @@ class AIFieldMapper:
     ) -> Dict[str, Any]:
         """Normalize field metadata for prompting."""
 
-        data_type = field.get('data_type', 'text')
+        get = field.get
+        data_type = get('data_type', 'text')
         context: Dict[str, Any] = {
-            'name': field.get('field_name'),
+            'name': get('field_name'),
             'type': data_type,
-            'required': bool(field.get('required', False)),
+            'required': bool(get('required', False)),
             'normalization': self._field_normalization_hint(data_type)
         }
 
-        metadata = field.get('metadata')
+        metadata = get('metadata')
         if isinstance(metadata, dict):
             context['metadata'] = dict(metadata)
 
-        regex_hint = field.get('regex_hint')
+        regex_hint = get('regex_hint')
         if regex_hint:
             context['regex_hint'] = regex_hint
 
-        examples = field.get('examples') or field.get('format_examples') or field.get('example')
+        examples = get('examples') or get('format_examples') or get('example')
         if isinstance(examples, str):
             examples = [examples]
         if not examples:
@@ -620,70 +1597,73 @@ class AIFieldMapper:
         if examples:
             context['examples'] = examples
 
-        ocr_psm = field.get('ocr_psm')
+        ocr_psm = get('ocr_psm')
         if ocr_psm not in (None, ''):
             context['ocr_psm'] = ocr_psm
 
-        ocr_roi = field.get('ocr_roi')
+        ocr_roi = get('ocr_roi')
         if ocr_roi is not None:
             context['ocr_roi'] = ocr_roi
 
-        if field.get('calculated'):
+        if get('calculated'):
             context['calculated'] = True
 
         if hints:
-            type_hint = hints.get('type_hint')
-            if type_hint and 'type_hint' not in context:
+            hint = hints.get
+
+            type_hint = hint('type_hint')
+            if type_hint:
                 context['type_hint'] = type_hint
 
-            fallback = hints.get('fallback_value')
+            fallback = hint('fallback_value')
             if fallback is not None:
                 context['fallback_value'] = fallback
 
-            regex_patterns = hints.get('regex_patterns')
+            regex_patterns = hint('regex_patterns')
             if regex_patterns:
                 context['regex_overrides'] = regex_patterns
 
-            roi_hint = hints.get('roi')
+            roi_hint = hint('roi')
             if roi_hint is not None and 'ocr_roi' not in context:
                 context['ocr_roi'] = roi_hint
 
-            ocr_hint = hints.get('ocr')
+            ocr_hint = hint('ocr')
             if ocr_hint:
                 context['ocr_overrides'] = ocr_hint
 
-            preprocessing_hint = hints.get('preprocessing')
+            preprocessing_hint = hint('preprocessing')
             if preprocessing_hint:
                 context['preprocessing'] = preprocessing_hint
 
-            if hints.get('metadata'):
-                merged_metadata = {}
-                if isinstance(context.get('metadata'), dict):
-                    merged_metadata.update(context['metadata'])
-                if isinstance(hints.get('metadata'), dict):
-                    merged_metadata.update(hints['metadata'])
+            hint_metadata = hint('metadata')
+            if hint_metadata:
+                merged_metadata = context.get('metadata') or {}
+                if isinstance(hint_metadata, dict):
+                    merged_metadata = merged_metadata | hint_metadata
                 if merged_metadata:
                     context['metadata'] = merged_metadata
 
         return context
 
+    _DEFAULT_EXAMPLES: Dict[str, Tuple[str, ...]] = {
+        'date': ('31.12.2023', '01/01/2024'),
+        'number': ('1.234,56', '12.345,00'),
+    }
+    _NORMALIZATION_HINTS: Dict[str, str] = {
+        'date': 'Tarihleri DD.MM.YYYY veya DD/MM/YYYY biçimine dönüştür.',
+        'number': 'Sayıları 1.234,56 formatında yaz, gereksiz karakterleri kaldır.',
+        'text': 'Metni olduğu gibi aktar, baş/son boşlukları temizle.'
+    }
+
     def _default_examples_for_type(self, data_type: str) -> List[str]:
         """Provide deterministic formatting examples by data type."""
 
-        if data_type == 'date':
-            return ['31.12.2023', '01/01/2024']
-        if data_type == 'number':
-            return ['1.234,56', '12.345,00']
-        return []
+        return list(self._DEFAULT_EXAMPLES.get(data_type, ()))
 
     def _field_normalization_hint(self, data_type: str) -> str:
         """Return normalization hint for a data type."""
 
-        hints = {
-            'date': 'Tarihleri DD.MM.YYYY veya DD/MM/YYYY biçimine dönüştür.',
-            'number': 'Sayıları 1.234,56 formatında yaz, gereksiz karakterleri kaldır.',
-            'text': 'Metni olduğu gibi aktar, baş/son boşlukları temizle.'
-        }
+        hints = self._NORMALIZATION_HINTS
         return hints.get(data_type, hints['text'])
 
     @staticmethod
@@ -698,11 +1678,7 @@ class AIFieldMapper:
         except (TypeError, ValueError):
             return None
 
-    @staticmethod
-    def _normalize_token(token: str) -> str:
-        """Normalize tokens for fuzzy OCR comparisons."""
-
-        return re.sub(r'[^0-9a-zA-ZçğıöşüÇĞİÖŞÜ]', '', token).lower()
+    _normalize_token = staticmethod(_normalize_token)
 
     def _regex_flag_value(self, flags: Optional[Any]) -> int:
         """Convert flag descriptors into a Python regex flag bitmask."""
@@ -713,27 +1689,16 @@ class AIFieldMapper:
         if isinstance(flags, int):
             return flags
 
-        flag_value = 0
-        candidates: List[Any]
-
         if isinstance(flags, str):
-            candidates = [flags]
-        elif isinstance(flags, (list, tuple, set)):
-            candidates = list(flags)
-        else:
-            return re.IGNORECASE
-
-        for candidate in candidates:
-            if isinstance(candidate, int):
-                flag_value |= candidate
-                continue
-            if not isinstance(candidate, str):
-                continue
-            attr = getattr(re, candidate.upper(), None)
-            if isinstance(attr, int):
-                flag_value |= attr
-
-        return flag_value or re.IGNORECASE
+            return _flag_value((flags,))
+        if isinstance(flags, (list, tuple, set)):
+            try:
+                return _flag_value(tuple(flags))
+            except TypeError:  # unhashable entries are ignored anyway
+                return _flag_value(
+                    tuple(flag for flag in flags if isinstance(flag, (int, str)))
+                )
+        return re.IGNORECASE
 
     def _summarize_field_hints(self, hints: Dict[str, Any]) -> Dict[str, Any]:
         """Return a sanitized view of field hints for prompting."""
@@ -760,80 +1725,88 @@ class AIFieldMapper:
 
         return summary
 
-    def _build_word_confidence_map(self, ocr_data: Dict[str, Any]) -> Dict[str, List[float]]:
-        """Aggregate OCR confidences per normalized token."""
+    def _build_word_confidence_map(
+        self, ocr_data: Dict[str, Any]
+    ) -> Dict[str, float]:
+        """Mean OCR confidence per normalized token."""
 
         if not isinstance(ocr_data, dict):
             return {}
 
-        token_confidences: Dict[str, List[float]] = defaultdict(list)
-
+        # Gather (word, raw score) pairs from both sources first, then
+        # aggregate them in one tight loop without per-token tuples.
+        scored: List[Tuple[Any, Any]] = []
         confidence_scores = ocr_data.get('confidence_scores')
         if isinstance(confidence_scores, dict):
-            for token, score in confidence_scores.items():
-                if not isinstance(token, str):
-                    continue
-                float_score = self._safe_float(score)
-                if float_score is None:
-                    continue
-                float_score = max(0.0, min(float_score, 1.0))
-                lowered = token.strip().lower()
-                if lowered:
-                    token_confidences[lowered].append(float_score)
-                normalized = self._normalize_token(token)
-                if normalized and normalized != lowered:
-                    token_confidences[normalized].append(float_score)
-
+            scored.extend(confidence_scores.items())
         words_with_bbox = ocr_data.get('words_with_bbox')
         if isinstance(words_with_bbox, list):
-            for entry in words_with_bbox:
-                if not isinstance(entry, dict):
-                    continue
-                word = entry.get('word')
-                confidence = self._safe_float(entry.get('confidence'))
-                if not word or confidence is None:
+            scored.extend(
+                (entry.get('word'), entry.get('confidence'))
+                for entry in words_with_bbox
+                if isinstance(entry, dict)
+            )
+
+        sums: Dict[str, float] = {}
+        counts: Dict[str, int] = {}
+        safe_float = self._safe_float
+        normalize = self._normalize_token
+        for word, raw_score in scored:
+            if not word or not isinstance(word, str):
+                continue
+            score = safe_float(raw_score)
+            if score is None:
+                continue
+            score = 0.0 if score < 0.0 else 1.0 if score > 1.0 else score
+
+            lowered = word.strip().lower()
+            normalized = normalize(word)
+            for token in (lowered, normalized if normalized != lowered else None):
+                if not token:
                     continue
-                confidence = max(0.0, min(confidence, 1.0))
-                lowered = word.strip().lower()
-                if lowered:
-                    token_confidences[lowered].append(confidence)
-                normalized = self._normalize_token(word)
-                if normalized and normalized != lowered:
-                    token_confidences[normalized].append(confidence)
+                if token in sums:
+                    sums[token] += score
+                    counts[token] += 1
+                else:
+                    sums[token] = score
+                    counts[token] = 1
 
-        # Remove empty entries
-        return {token: scores for token, scores in token_confidences.items() if scores}
+        # Averaged once here so each value lookup is a single dict access.
+        return {token: total / counts[token] for token, total in sums.items()}
 
     def _compute_value_ocr_confidence(
         self,
         value: str,
-        word_conf_map: Dict[str, List[float]]
+        word_conf_map: Dict[str, float]
     ) -> Optional[float]:
         """Return OCR confidence aligned with the provided value."""
 
         if not value:
             return None
 
-        tokens = re.findall(r"[0-9A-Za-zçğıöşüÇĞİÖŞÜ]+", value)
-        if not tokens:
+        tokens = _VALUE_TOKEN_PATTERN.findall(value)
+        matched = bool(tokens)
+        if not matched:
             tokens = [value]
 
-        confidences: List[float] = []
+        confidence_sum = 0.0
+        matched_count = 0
 
         for token in tokens:
-            lowered = token.strip().lower()
-            candidates = word_conf_map.get(lowered)
-            if not candidates:
-                normalized = self._normalize_token(token)
-                candidates = word_conf_map.get(normalized)
-            if candidates:
-                confidences.append(sum(candidates) / len(candidates))
-
-        if not confidences:
+            # Pattern tokens carry no whitespace; only the raw-value fallback might.
+            lowered = token.lower() if matched else token.strip().lower()
+            mean = word_conf_map.get(lowered)
+            if mean is None:
+                mean = word_conf_map.get(self._normalize_token(token))
+            if mean is not None:
+                confidence_sum += mean
+                matched_count += 1
+
+        if not matched_count:
             return None
 
-        coverage = len(confidences) / len(tokens) if tokens else 1.0
-        avg_conf = sum(confidences) / len(confidences)
+        coverage = matched_count / len(tokens)
+        avg_conf = confidence_sum / matched_count
 
         return max(0.0, min(1.0, avg_conf * coverage))
 
@@ -850,6 +1823,9 @@ class AIFieldMapper:
 
         evidence: Dict[str, Any] = {}
         hints = field_hints or {}
+        # Field names by data type, for the heuristics in step 2.
+        date_fields: List[str] = []
+        number_fields: List[str] = []
 
         # 1) Respect user-provided regex hints per field.
         for field in template_fields:
@@ -857,15 +1833,18 @@ class AIFieldMapper:
             if not field_name:
                 continue
 
-            pattern_candidates: List[Dict[str, Any]] = []
+            data_type = field.get('data_type')
+            if data_type == 'date':
+                date_fields.append(field_name)
+            elif data_type == 'number':
+                number_fields.append(field_name)
+
+            # (pattern, flags, source) per candidate
+            pattern_candidates: List[Tuple[Any, Any, Any]] = []
 
             pattern_text = field.get('regex_hint')
             if pattern_text:
-                pattern_candidates.append({
-                    'pattern': pattern_text,
-                    'flags': None,
-                    'source': 'template'
-                })
+                pattern_candidates.append((pattern_text, None, 'template'))
 
             hint_data = hints.get(field_name)
             if isinstance(hint_data, dict):
@@ -875,31 +1854,25 @@ class AIFieldMapper:
                 for hint_pattern in hint_patterns:
                     if not isinstance(hint_pattern, dict):
                         continue
-                    pattern_candidates.append({
-                        'pattern': hint_pattern.get('pattern'),
-                        'flags': hint_pattern.get('flags'),
-                        'source': hint_pattern.get('source', 'hint')
-                    })
+                    pattern_candidates.append((
+                        hint_pattern.get('pattern'),
+                        hint_pattern.get('flags'),
+                        hint_pattern.get('source', 'hint'),
+                    ))
 
             if not pattern_candidates:
                 continue
 
             pattern_evidence: List[Dict[str, Any]] = []
-            for candidate in pattern_candidates:
-                pattern_str = candidate.get('pattern')
+            for pattern_str, flags, source in pattern_candidates:
                 if not pattern_str:
                     continue
-                try:
-                    compiled = re.compile(
-                        pattern_str,
-                        self._regex_flag_value(candidate.get('flags'))
-                    )
-                except re.error as exc:
-                    logger.warning(
-                        "Geçersiz regex (%s) alanı %s için: %s",
+                compiled = _hint_pattern(pattern_str, self._regex_flag_value(flags))
+                if compiled is None:
+                    logger.debug(
+                        "Geçersiz regex (%s) alanı %s için atlandı",
                         pattern_str,
                         field_name,
-                        exc
                     )
                     continue
 
@@ -917,7 +1890,7 @@ class AIFieldMapper:
                 if normalized_matches:
                     pattern_evidence.append({
                         'pattern': compiled.pattern,
-                        'source': candidate.get('source', 'regex'),
+                        'source': source,
                         'matches': normalized_matches
                     })
 
@@ -930,36 +1903,27 @@ class AIFieldMapper:
                 evidence[field_name] = {'patterns': pattern_evidence}
 
         # 2) Apply general heuristics for commonly formatted data types.
-        date_matches = re.findall(r"\b\d{1,2}[./-]\d{1,2}[./-]\d{2,4}\b", ocr_text)
-        if date_matches:
-            deduped_dates = list(dict.fromkeys(date_matches))[:3]
-            for field in template_fields:
-                if (
-                    field.get('data_type') == 'date'
-                    and field.get('field_name') not in evidence
-                    and deduped_dates
-                ):
-                    evidence[field['field_name']] = {
-                        'pattern': 'auto_date',
-                        'matches': deduped_dates
-                    }
-
-        number_matches = re.findall(
-            r"\b\d{1,3}(?:[.,]\d{3})*(?:[.,]\d+)?\b",
-            ocr_text
+        # Only scan the text when some field can still use the result.
+        date_fields = [name for name in date_fields if name not in evidence]
+        number_fields = [name for name in number_fields if name not in evidence]
+        if not date_fields and not number_fields:
+            return evidence
+
+        deduped_dates, deduped_numbers = _scan_auto_values(
+            ocr_text, bool(date_fields), bool(number_fields)
         )
-        if number_matches:
-            deduped_numbers = list(dict.fromkeys(number_matches))[:5]
-            for field in template_fields:
-                if (
-                    field.get('data_type') == 'number'
-                    and field.get('field_name') not in evidence
-                    and deduped_numbers
-                ):
-                    evidence[field['field_name']] = {
-                        'pattern': 'auto_number',
-                        'matches': deduped_numbers
-                    }
+        if deduped_dates:
+            for field_name in date_fields:
+                evidence[field_name] = {
+                    'pattern': 'auto_date',
+                    'matches': deduped_dates
+                }
+        if deduped_numbers:
+            for field_name in number_fields:
+                evidence[field_name] = {
+                    'pattern': 'auto_number',
+                    'matches': deduped_numbers
+                }
 
         return evidence
 
@@ -975,45 +1939,58 @@ class AIFieldMapper:
         if not isinstance(field_mappings, dict) or not field_mappings:
             return
 
-        word_conf_map = self._build_word_confidence_map(ocr_data)
-        metadata_index = {
-            field.get('field_name'): field for field in template_fields if field.get('field_name')
+        # Built on first use: results without any values never need it.
+        word_conf_map: Optional[Dict[str, float]] = None
+        # (regex_hint, required) per field, read once instead of per lookup.
+        field_rules = {
+            field.get('field_name'): (field.get('regex_hint'), field.get('required'))
+            for field in template_fields
+            if field.get('field_name')
         }
+        no_rules = (None, None)
+        safe_float = self._safe_float
+        compute_ocr_conf = self._compute_value_ocr_confidence
 
-        collected_confidences: List[float] = []
+        confidence_sum = 0.0
+        confidence_count = 0
 
         for field_name, mapping in field_mappings.items():
             if not isinstance(mapping, dict):
                 continue
 
-            metadata = metadata_index.get(field_name, {})
-            llm_conf = self._safe_float(mapping.get('confidence')) or 0.0
+            regex_hint, required = field_rules.get(field_name, no_rules)
+            llm_conf = safe_float(mapping.get('confidence')) or 0.0
             value = mapping.get('value')
-            value_str = str(value).strip() if value not in (None, "") else ""
+            if type(value) is str:
+                # Common case: the model already returned text.
+                value_str = value.strip()
+            else:
+                value_str = "" if value is None else str(value).strip()
 
             ocr_conf = None
-            if value_str and word_conf_map:
-                ocr_conf = self._compute_value_ocr_confidence(value_str, word_conf_map)
-
             regex_ok = True
-            regex_hint = metadata.get('regex_hint')
-            if regex_hint and value_str:
-                try:
-                    regex_ok = bool(re.search(regex_hint, value_str))
-                except re.error:
-                    regex_ok = True
-
-            combined_conf = llm_conf
-            if ocr_conf is not None:
-                combined_conf = (llm_conf * 0.6) + (ocr_conf * 0.4)
-
-            if not regex_ok:
-                combined_conf = min(combined_conf, llm_conf * 0.5)
-
-            if metadata.get('required') and not value_str:
+            if value_str:
+                if word_conf_map is None:
+                    word_conf_map = self._word_confidence_map(ocr_data)
+                if word_conf_map:
+                    ocr_conf = compute_ocr_conf(value_str, word_conf_map)
+                if regex_hint:
+                    pattern = _hint_pattern(regex_hint)
+                    regex_ok = pattern is None or bool(pattern.search(value_str))
+
+            if required and not value_str:
                 combined_conf = 0.0
-
-            combined_conf = max(0.0, min(1.0, combined_conf))
+            else:
+                combined_conf = (
+                    llm_conf if ocr_conf is None else llm_conf * 0.6 + ocr_conf * 0.4
+                )
+                if not regex_ok and combined_conf > llm_conf * 0.5:
+                    combined_conf = llm_conf * 0.5
+                combined_conf = (
+                    0.0 if combined_conf < 0.0
+                    else 1.0 if combined_conf > 1.0
+                    else combined_conf
+                )
 
             mapping['confidence'] = combined_conf
             mapping['confidence_breakdown'] = {
@@ -1022,10 +1999,11 @@ class AIFieldMapper:
                 'regex_valid': regex_ok
             }
 
-            collected_confidences.append(combined_conf)
+            confidence_sum += combined_conf
+            confidence_count += 1
 
-        if collected_confidences:
-            result['overall_confidence'] = sum(collected_confidences) / len(collected_confidences)
+        if confidence_count:
+            result['overall_confidence'] = confidence_sum / confidence_count
 
     def _strip_code_fences(self, response_text: str) -> str:
         """Remove common markdown code fences from an LLM response."""
@@ -1041,40 +2019,32 @@ class AIFieldMapper:
 
         return text.strip()
 
-    def _extract_json_object(self, response_text: str) -> Optional[str]:
-        """Try to extract the first complete JSON object from text."""
-        brace_depth = 0
-        start_index: Optional[int] = None
-
-        for index, char in enumerate(response_text):
-            if char == '{':
-                if brace_depth == 0:
-                    start_index = index
-                brace_depth += 1
-            elif char == '}':
-                if brace_depth:
-                    brace_depth -= 1
-                    if brace_depth == 0 and start_index is not None:
-                        return response_text[start_index:index + 1]
+    def _extract_json_object(self, response_text: str) -> Optional[Dict[str, Any]]:
+        """Decode the first valid JSON object embedded in text."""
+        start_index = response_text.find('{')
+        while start_index >= 0:
+            try:
+                obj, _ = _JSON_DECODER.raw_decode(response_text, start_index)
+            except json.JSONDecodeError:
+                start_index = response_text.find('{', start_index + 1)
+                continue
+            # Starting at '{' the decoder can only produce an object.
+            return obj
 
         return None
 
     def _safe_json_loads(self, response_text: str) -> Dict[str, Any]:
         """Parse JSON from AI response, handling markdown and extra text."""
+        text = response_text.strip()
+        # Only fenced responses need fence stripping; anything else is parsed
+        # as-is once and, failing that, searched for its JSON object.
+        candidate = self._strip_code_fences(text) if text.startswith("```") else text
         try:
-            return json.loads(response_text)
+            return loads_json(candidate)
         except json.JSONDecodeError:
-            cleaned_text = self._strip_code_fences(response_text)
-            if cleaned_text != response_text:
-                try:
-                    return json.loads(cleaned_text)
-                except json.JSONDecodeError:
-                    pass
-
-            extracted_source = cleaned_text if cleaned_text else response_text
-            extracted_json = self._extract_json_object(extracted_source)
-            if extracted_json:
-                return json.loads(extracted_json)
+            extracted = self._extract_json_object(candidate or text)
+            if extracted is not None:
+                return extracted
             raise
 
     def _log_parse_failure(self, response_text: str, error: Exception) -> None:
@@ -1174,43 +2144,24 @@ class AIFieldMapper:
 
         evidence_map = field_evidence or {}
         field_mappings: Dict[str, Any] = {}
-        confidences: List[float] = []
-
-        for field in template_fields:
-            field_name = field.get('field_name')
-            if not field_name:
-                continue
-
-            metadata = {
-                'data_type': field.get('data_type'),
-                'required': bool(field.get('required', False)),
-                'regex_hint': field.get('regex_hint'),
-                'ocr_psm': field.get('ocr_psm'),
-                'ocr_roi': field.get('ocr_roi')
-            }
-
-            mapping_entry = {
-                'value': None,
-                'confidence': 0.0,
-                'source': 'Bulunamadı',
-                'data_type': field.get('data_type'),
-                'required': bool(field.get('required', False)),
-                'metadata': metadata
-            }
+        confidence_sum = 0.0
+        confidence_count = 0
 
-            evidence = evidence_map.get(field_name)
+        for spec in self._template_field_specs(template_fields):
+            evidence = evidence_map.get(spec.name)
             value = self._extract_evidence_match(evidence)
 
             if value:
                 confidence = self._evidence_confidence(evidence)
-                mapping_entry['value'] = value
-                mapping_entry['confidence'] = confidence
-                mapping_entry['source'] = self._describe_evidence_source(evidence)
-                confidences.append(confidence)
-
-            field_mappings[field_name] = mapping_entry
+                confidence_sum += confidence
+                confidence_count += 1
+                field_mappings[spec.name] = _mapping_entry(
+                    spec, value, confidence, self._describe_evidence_source(evidence)
+                )
+            else:
+                field_mappings[spec.name] = _mapping_entry(spec, None, 0.0, 'Bulunamadı')
 
-        overall_confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        overall_confidence = confidence_sum / confidence_count if confidence_count else 0.0
 
         return {
             'field_mappings': field_mappings,
@@ -1218,9 +2169,70 @@ class AIFieldMapper:
             'error': error_msg
         }
 
+    @staticmethod
+    def _unambiguous_evidence_value(evidence: Any) -> Optional[str]:
+        """The single value all template/hint regex matches agree on, if any."""
+
+        if not isinstance(evidence, dict):
+            return None
+        patterns = evidence.get('patterns')
+        if not isinstance(patterns, list):
+            patterns = [evidence]
+
+        values = set()
+        for pattern_info in patterns:
+            # auto_date/auto_number list every candidate in the text, so they
+            # never identify a field on their own.
+            if not isinstance(pattern_info, dict) or not pattern_info.get('source'):
+                return None
+            matches = pattern_info.get('matches')
+            if not isinstance(matches, list):
+                return None
+            values.update(str(match).strip() for match in matches)
+
+        values.discard("")
+        return values.pop() if len(values) == 1 else None
+
+    def _evidence_only_result(
+        self,
+        template_fields: List[Dict[str, Any]],
+        field_evidence: Optional[Dict[str, Any]],
+        ocr_data: Optional[Dict[str, Any]],
+    ) -> Optional[Dict[str, Any]]:
+        """Mapping built from regex evidence alone, when it leaves no doubt.
+
+        Used only when every template field has exactly one distinct match
+        from its template or hint patterns, shaped like the field's data type;
+        otherwise the model decides.
+        """
+
+        if not settings.AI_MAPPER_ALLOW_REGEX_SHORTCUT or not field_evidence:
+            return None
+        specs = self._template_field_specs(template_fields)
+        if not specs:
+            return None
+        get_evidence = field_evidence.get
+        for spec in specs:
+            value = self._unambiguous_evidence_value(get_evidence(spec.name))
+            if value is None or not _value_matches_data_type(value, spec.data_type):
+                return None
+
+        result = self._build_partial_mapping_from_evidence(
+            template_fields, field_evidence, ""
+        )
+        result.pop('error', None)
+        if ocr_data and isinstance(ocr_data, dict):
+            self._merge_ocr_confidence(result, ocr_data, template_fields)
+
+        logger.info(
+            "AI çağrısı atlandı, tüm alanlar regex ile bulundu: %s alan",
+            len(specs)
+        )
+        return result
+
     def _parse_ai_response(
         self,
-        response_text: str,
+        response_text: Union[str, Dict[str, Any]],
         template_fields: List[Dict[str, Any]],
         field_evidence: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
@@ -1228,14 +2240,22 @@ class AIFieldMapper:
         Parse AI response and format for application
 
         Args:
-            response_text: Raw AI response
+            response_text: Raw AI response, or the already decoded JSON object
             template_fields: Template field definitions
 
         Returns:
             Formatted mapping result
         """
         try:
-            ai_result = self._safe_json_loads(response_text)
+            if isinstance(response_text, dict):
+                ai_result = response_text
+            elif self._provider_guarantees_json:
+                # JSON mode never wraps the object in fences or prose; a
+                # decode error here means a truncated reply, which the
+                # extraction fallback could not repair anyway.
+                ai_result = loads_json(response_text)
+            else:
+                ai_result = self._safe_json_loads(response_text)
 
             # Format result
             result = {
@@ -1244,37 +2264,20 @@ class AIFieldMapper:
             }
 
             mappings = ai_result.get('mappings', {})
-
-            for field in template_fields:
-                field_name = field['field_name']
-                metadata = {
-                    'data_type': field.get('data_type'),
-                    'required': bool(field.get('required', False)),
-                    'regex_hint': field.get('regex_hint'),
-                    'ocr_psm': field.get('ocr_psm'),
-                    'ocr_roi': field.get('ocr_roi')
-                }
-
-                if field_name in mappings:
-                    mapping = mappings[field_name]
-                    result['field_mappings'][field_name] = {
-                        'value': mapping.get('value'),
-                        'confidence': float(mapping.get('confidence', 0.0)),
-                        'source': mapping.get('source', ''),
-                        'data_type': field['data_type'],
-                        'required': metadata['required'],
-                        'metadata': metadata
-                    }
+            field_mappings = result['field_mappings']
+
+            for spec in self._template_field_specs(template_fields):
+                mapping = mappings.get(spec.name)
+                if mapping is not None:
+                    field_mappings[spec.name] = _mapping_entry(
+                        spec,
+                        mapping.get('value'),
+                        float(mapping.get('confidence', 0.0)),
+                        mapping.get('source', ''),
+                    )
                 else:
                     # Field not found
-                    result['field_mappings'][field_name] = {
-                        'value': None,
-                        'confidence': 0.0,
-                        'source': 'Bulunamadı',
-                        'data_type': field['data_type'],
-                        'required': metadata['required'],
-                        'metadata': metadata
-                    }
+                    field_mappings[spec.name] = _mapping_entry(spec, None, 0.0, 'Bulunamadı')
 
             result.pop('error', None)
             return result
@@ -1292,6 +2295,40 @@ class AIFieldMapper:
             logger.error(f"Yanıt işleme hatası: {str(e)}")
             return self._create_empty_mapping(template_fields, str(e))
 
+    def _template_field_specs(
+        self, template_fields: List[Dict[str, Any]]
+    ) -> List[_FieldSpec]:
+        """:func:`_field_specs`, reused while the same field list comes back."""
+
+        cached = self._last_field_specs
+        if (
+            cached is not None
+            and cached[0] is template_fields
+            and cached[1] == len(template_fields)
+        ):
+            return cached[2]
+        specs = _field_specs(template_fields)
+        self._last_field_specs = (template_fields, len(template_fields), specs)
+        return specs
+
+    def _word_confidence_map(self, ocr_data: Dict[str, Any]) -> Dict[str, float]:
+        """:meth:`_build_word_confidence_map`, reused for the same OCR payload."""
+
+        if not isinstance(ocr_data, dict):
+            return {}
+        sources = (ocr_data.get('confidence_scores'), ocr_data.get('words_with_bbox'))
+        cached = self._last_word_map
+        if (
+            cached is not None
+            and cached[0] is ocr_data
+            and cached[1][0] is sources[0]
+            and cached[1][1] is sources[1]
+        ):
+            return cached[2]
+        word_map = self._build_word_confidence_map(ocr_data)
+        self._last_word_map = (ocr_data, sources, word_map)
+        return word_map
+
     def _create_empty_mapping(
         self,
         template_fields: List[Dict[str, Any]],
@@ -1313,21 +2350,9 @@ class AIFieldMapper:
             'error': error_msg
         }
 
-        for field in template_fields:
-            result['field_mappings'][field['field_name']] = {
-                'value': None,
-                'confidence': 0.0,
-                'source': 'Hata oluştu',
-                'data_type': field['data_type'],
-                'required': bool(field.get('required', False)),
-                'metadata': {
-                    'data_type': field.get('data_type'),
-                    'required': bool(field.get('required', False)),
-                    'regex_hint': field.get('regex_hint'),
-                    'ocr_psm': field.get('ocr_psm'),
-                    'ocr_roi': field.get('ocr_roi')
-                }
-            }
+        field_mappings = result['field_mappings']
+        for spec in self._template_field_specs(template_fields):
+            field_mappings[spec.name] = _mapping_entry(spec, None, 0.0, 'Hata oluştu')
 
         return result
 
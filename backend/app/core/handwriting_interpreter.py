@@ -13,29 +13,13 @@ from app.config import settings
 from app.utils.data_masker import DataMasker
 from app.utils.smart_openai import (
     call_reasoning_model,
+    configure_legacy_openai,
     extract_reasoning_response_text,
+    get_openai_client,
+    load_openai_sdk,
+    loads_json,
 )
 
-try:  # pragma: no cover - prefer modern OpenAI client
-    from openai import AuthenticationError, OpenAI, OpenAIError
-except ImportError:  # pragma: no cover - fallback for legacy client
-    OpenAI = None  # type: ignore
-    try:
-        import openai  # type: ignore
-    except ImportError:  # pragma: no cover - library not available
-        openai = None  # type: ignore
-
-    try:
-        from openai.error import AuthenticationError, OpenAIError  # type: ignore
-    except ImportError:  # pragma: no cover - final fallback
-        AuthenticationError = Exception
-        OpenAIError = Exception
-else:  # pragma: no cover - compatibility shim
-    try:
-        import openai  # type: ignore
-    except ImportError:  # pragma: no cover - handle missing legacy client
-        openai = None  # type: ignore
-
 logger = logging.getLogger(__name__)
 
 
@@ -222,11 +206,12 @@ class HandwritingInterpreter:
         self._has_valid_api_key = bool(api_key and api_key.strip())
         self._client = None
         if self._has_valid_api_key:
-            if OpenAI is not None:  # pragma: no cover - requires modern SDK
-                self._client = OpenAI(api_key=api_key)
+            sdk = load_openai_sdk()
+            if sdk.OpenAI is not None:  # pragma: no cover - requires modern SDK
+                self._client = get_openai_client(api_key, sdk.OpenAI)
             else:  # pragma: no cover - legacy SDK
-                if openai is not None:
-                    openai.api_key = api_key  # type: ignore[union-attr]
+                if sdk.module is not None:
+                    configure_legacy_openai(sdk.module, api_key)
                 else:
                     logger.warning(
                         "Uzman modeli için OpenAI legacy istemcisi bulunamadı."
@@ -260,14 +245,23 @@ class HandwritingInterpreter:
         )
 
         sections: List[str] = []
-        sections.append("Belge özeti: " + json.dumps(document_summary, ensure_ascii=False))
+        # Compact JSON: the model reads it just as well with fewer tokens.
+        sections.append(
+            "Belge özeti: "
+            + json.dumps(document_summary, ensure_ascii=False, separators=(",", ":"))
+        )
         if document_info:
             sections.append(
-                "Belge metaverisi: " + json.dumps(document_info, ensure_ascii=False)
+                "Belge metaverisi: "
+                + json.dumps(document_info, ensure_ascii=False, separators=(",", ":"))
             )
         sections.append(
             "Genel OCR metin önizlemesi:\n"
-            + json.dumps({"segments": document_snippets}, ensure_ascii=False)
+            + json.dumps(
+                {"segments": document_snippets},
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
         )
 
         hints = field_hints or {}
@@ -302,7 +296,8 @@ class HandwritingInterpreter:
             }
             sections.append(analysis)
             sections.append(
-                f"Alan: {field_name}\n" + json.dumps(field_context, ensure_ascii=False)
+                f"Alan: {field_name}\n"
+                + json.dumps(field_context, ensure_ascii=False, separators=(",", ":"))
             )
 
         instructions = (
@@ -400,6 +395,7 @@ class HandwritingInterpreter:
                 }
             )
 
+        sdk = load_openai_sdk()
         start_time = time.perf_counter()
         response_payload: Dict[str, Any] = {
             "field_mappings": {},
@@ -439,21 +435,22 @@ class HandwritingInterpreter:
                     if temperature is not None:
                         request_kwargs["temperature"] = temperature
                     response = self._client.chat.completions.create(**request_kwargs)
-                logger.debug("Uzman modeli ham yanıt türü: %s", type(response))
-                if hasattr(response, "model_dump_json"):
-                    try:
-                        logger.debug(
-                            "Uzman modeli ham yanıt (model_dump_json): %s",
-                            response.model_dump_json(),
-                        )
-                    except Exception:  # pragma: no cover - diagnostic path
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Uzman modeli ham yanıt türü: %s", type(response))
+                    if hasattr(response, "model_dump_json"):
+                        try:
+                            logger.debug(
+                                "Uzman modeli ham yanıt (model_dump_json): %s",
+                                response.model_dump_json(),
+                            )
+                        except Exception:  # pragma: no cover - diagnostic path
+                            logger.debug("Uzman modeli ham yanıt (repr): %r", response)
+                    else:
                         logger.debug("Uzman modeli ham yanıt (repr): %r", response)
-                else:
-                    logger.debug("Uzman modeli ham yanıt (repr): %r", response)
                 response_payload.update(
                     self._parse_openai_response(response, masker)
                 )
-            elif openai is not None:  # pragma: no cover - legacy SDK
+            elif sdk.module is not None:  # pragma: no cover - legacy SDK
                 request_kwargs = {
                     "model": self.model,
                     "messages": messages,
@@ -461,7 +458,7 @@ class HandwritingInterpreter:
                 }
                 if temperature is not None:
                     request_kwargs["temperature"] = temperature
-                response = openai.ChatCompletion.create(**request_kwargs)
+                response = sdk.module.ChatCompletion.create(**request_kwargs)
                 response_payload.update(
                     self._parse_openai_response(response, masker)
                 )
@@ -480,10 +477,10 @@ class HandwritingInterpreter:
                 total = (prompt_tokens or 0) + (completion_tokens or 0)
                 response_payload["estimated_cost"] = self._estimate_cost(total)
 
-        except AuthenticationError:
+        except sdk.AuthenticationError:
             logger.exception("Uzman modeli kimlik doğrulama hatası")
             response_payload["error"] = "Authentication failed for specialist model."
-        except OpenAIError as exc:  # pragma: no cover - requires API access
+        except sdk.OpenAIError as exc:  # pragma: no cover - requires API access
             logger.exception("Uzman modeli çağrısı başarısız")
             response_payload["error"] = str(exc)
         except Exception as exc:  # pragma: no cover - defensive fallback
@@ -846,7 +843,7 @@ class HandwritingInterpreter:
             content = masker.unmask_text(content) or content
 
         try:
-            data = json.loads(content)
+            data = loads_json(content)
         except json.JSONDecodeError:
             preview_source = raw_content or content or ""
             logger.warning("Uzman modeli JSON parse edilemedi: %s", preview_source[:200])
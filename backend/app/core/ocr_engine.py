@@ -310,7 +310,7 @@ class OCREngine:
                 }
             )
 
-            tokens = [token for token in re.split(r"\s+", text_value) if token]
+            tokens = text_value.split()
             if not tokens:
                 tokens = [text_value]
 
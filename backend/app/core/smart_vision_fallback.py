@@ -11,19 +11,15 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional
 
-from ..utils.smart_openai import extract_reasoning_response_text
+from ..utils.smart_openai import (
+    extract_reasoning_response_text,
+    get_openai_client,
+    load_openai_sdk,
+    loads_json,
+)
 
 logger = logging.getLogger(__name__)
 
-try:  # pragma: no cover - prefer modern OpenAI client when available
-    from openai import OpenAI, OpenAIError
-except Exception:  # pragma: no cover - importlib fallback for legacy SDKs
-    OpenAI = None  # type: ignore
-    try:  # pragma: no cover - legacy OpenAI SDK structure
-        from openai.error import OpenAIError  # type: ignore
-    except Exception:  # pragma: no cover - fallback to generic exception
-        OpenAIError = Exception
-
 
 @dataclass
 class OCRQualityReport:
@@ -115,9 +111,10 @@ class SmartVisionFallback:
         self._client = client
         self._last_quality_report: Optional[OCRQualityReport] = None
 
-        if self._client is None and OpenAI is not None and api_key:
+        client_cls = load_openai_sdk().OpenAI if self._client is None and api_key else None
+        if client_cls is not None:
             try:
-                self._client = OpenAI(api_key=api_key)
+                self._client = get_openai_client(api_key, client_cls)
                 logger.debug("SmartVisionFallback OpenAI istemcisi hazırlandı (modern SDK).")
             except Exception as exc:  # pragma: no cover - requires SDK runtime
                 logger.warning("OpenAI Vision istemcisi oluşturulamadı: %s", exc)
@@ -219,7 +216,7 @@ class SmartVisionFallback:
                         },
                     ],
                 )
-        except OpenAIError as exc:  # pragma: no cover - requires API access
+        except load_openai_sdk().OpenAIError as exc:  # pragma: no cover - requires API access
             logger.error("OpenAI Vision çağrısı başarısız: %s", exc)
             return {"field_mappings": {}, "error": str(exc)}
         except Exception as exc:  # pragma: no cover - defensive fallback
@@ -337,7 +334,7 @@ class SmartVisionFallback:
         cleaned_output = self._strip_code_fences(text_output)
 
         try:
-            parsed = json.loads(cleaned_output)
+            parsed = loads_json(cleaned_output)
         except json.JSONDecodeError:
             logger.warning(
                 "Vision fallback yanıtı JSON formatında değil: %s", text_output
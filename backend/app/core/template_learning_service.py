@@ -17,6 +17,21 @@ from ..database import CorrectionFeedback, TemplateField, TemplateFieldHint
 logger = logging.getLogger(__name__)
 
 
+def _unique_head(values: Iterable[str], limit: int) -> List[str]:
+    """First ``limit`` distinct values in order, stopping as soon as found."""
+
+    seen: set[str] = set()
+    head: List[str] = []
+    for value in values:
+        if value in seen:
+            continue
+        seen.add(value)
+        head.append(value)
+        if len(head) >= limit:
+            break
+    return head
+
+
 class TemplateLearningService:
     """Persist user corrections and infer template field hints."""
 
@@ -31,6 +46,7 @@ class TemplateLearningService:
     )
     _NUMBER_PATTERN = re.compile(r"^-?\d+(?:[.,]\d+)?$")
     _ALNUM_PATTERN = re.compile(r"^[A-Z0-9]+$")
+    _NON_DIGIT_PATTERN = re.compile(r"[^0-9]")
 
     def __init__(self, db: Session):
         self.db = db
@@ -306,7 +322,7 @@ class TemplateLearningService:
 
     def _number_pattern(self, values: Sequence[str]) -> str:
         lengths = {
-            len(re.sub(r"[^0-9]", "", value))
+            len(self._NON_DIGIT_PATTERN.sub("", value))
             for value in values
             if value
         }
@@ -344,7 +360,7 @@ class TemplateLearningService:
     ) -> Dict[str, Any]:
         payload: Dict[str, Any] = {
             "source": "auto-learning",
-            "examples": list(dict.fromkeys(values))[:5],
+            "examples": _unique_head(values, 5),
         }
 
         if type_hint:
@@ -19,8 +19,10 @@ from datetime import datetime
 import logging
 import os
 
-# Database URL
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./digitalization.db")
+from app.config import Settings
+
+# Database URL (single source of truth lives in app.config)
+DATABASE_URL = Settings.DATABASE_URL
 
 # Create engine with UTF-8 support
 engine = create_engine(
@@ -12,6 +12,11 @@ import pytesseract
 
 from .config import settings
 from .database import init_db
+from .utils.migration_runner import (
+    get_migration_status,
+    run_migrations,
+    start_background_migrations,
+)
 from .routes import upload, template, batch, export, diag, learning
 
 # Configure logging
@@ -99,6 +104,15 @@ async def startup_event():
     # Configure Tesseract environment
     configure_tesseract()
 
+    # Apply pending migrations if requested
+    if settings.MIGRATION_MODE == "sync":
+        if not run_migrations(wait=True):
+            # Serving on a failed or half-applied schema is worse than not starting
+            raise RuntimeError("Migrasyonlar başarısız oldu; uygulama başlatılmadı")
+    elif settings.MIGRATION_MODE == "async":
+        start_background_migrations()
+        logger.info("Migrasyonlar arka planda çalıştırılıyor")
+
     # Initialize database
     if init_db():
         logger.info("Veritabanı hazır")
@@ -107,11 +121,13 @@ async def startup_event():
             "Veritabanı dosyası bulunamadı. Uygulama çalışmaya devam ediyor ancak lütfen `alembic upgrade head` komutunu çalıştırın."
         )
 
-    # Create directories
-    settings.UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-    settings.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    settings.TEMP_DIR.mkdir(parents=True, exist_ok=True)
-    logger.info("Dizinler oluşturuldu")
+    # Create directories (the settings properties create them on first access)
+    logger.info(
+        "Dizinler hazır: %s, %s, %s",
+        settings.UPLOAD_DIR,
+        settings.OUTPUT_DIR,
+        settings.TEMP_DIR,
+    )
 
     logger.info("✅ Dijitalleşme Asistanı API başlatıldı!")
 
@@ -130,11 +146,13 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    migrations = get_migration_status()
     return {
-        "status": "healthy",
+        "status": "unhealthy" if migrations.get("state") == "failed" else "healthy",
         "database": "connected",
         "uploads_dir": str(settings.UPLOAD_DIR),
-        "outputs_dir": str(settings.OUTPUT_DIR)
+        "outputs_dir": str(settings.OUTPUT_DIR),
+        "migrations": migrations,
     }
 
 
@@ -233,7 +233,7 @@ async def process_document_task(
             sorted(learned_hints.keys()) if learned_hints else []
         )
 
-        mapping_result = ai_mapper.map_fields(
+        mapping_result = await ai_mapper.map_fields_async(
             ocr_result.get('text', ''),
             template.target_fields,
             ocr_result,
@@ -378,6 +378,27 @@ async def process_document_task(
         db.close()
 
 
+async def process_documents_task(
+    document_ids: List[int],
+    template_id: int,
+    db_path: str
+):
+    """
+    Process the documents of a batch job concurrently
+
+    BackgroundTasks awaits its tasks one after another, so queuing one task
+    per document would serialize every AI round-trip. Running them together
+    lets each document's model call overlap with the others.
+    """
+    semaphore = asyncio.Semaphore(max(1, settings.BATCH_MAX_CONCURRENCY))
+
+    async def _bounded(document_id: int) -> None:
+        async with semaphore:
+            await process_document_task(document_id, template_id, db_path)
+
+    await asyncio.gather(*(_bounded(document_id) for document_id in document_ids))
+
+
 @router.post("/start", response_model=Dict[str, Any])
 async def start_batch_processing(
     request: BatchStartRequest,
@@ -440,13 +461,12 @@ async def start_batch_processing(
         # Start background processing
         db_path = settings.DATABASE_URL
 
-        for doc in documents:
-            background_tasks.add_task(
-                process_document_task,
-                doc.id,
-                request.template_id,
-                db_path
-            )
+        background_tasks.add_task(
+            process_documents_task,
+            [doc.id for doc in documents],
+            request.template_id,
+            db_path
+        )
 
         logger.info(f"Toplu işlem başlatıldı: {batch_job.id}, {len(documents)} belge")
 
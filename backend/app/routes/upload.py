@@ -3,10 +3,15 @@ from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Form
 from sqlalchemy.orm import Session
 import shutil
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import AbstractSet, Dict, Any, Optional
 import logging
 
-from ..config import settings
+from ..config import (
+    ALLOWED_EXTENSIONS,
+    ALLOWED_TEMPLATE_EXTENSIONS,
+    MAX_BATCH_SIZE,
+    settings,
+)
 from ..database import get_db, Document
 from ..utils.audit_logger import AuditLogger
 from ..models import DocumentResponse
@@ -16,7 +21,7 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/upload", tags=["upload"])
 
 
-def validate_file(file: UploadFile, allowed_extensions: set) -> bool:
+def validate_file(file: UploadFile, allowed_extensions: AbstractSet[str]) -> bool:
     """Validate file type and size"""
     file_ext = Path(file.filename).suffix.lower()
 
@@ -39,10 +44,10 @@ async def upload_sample_document(
     """
     try:
         # Validate file
-        if not validate_file(file, settings.ALLOWED_EXTENSIONS):
+        if not validate_file(file, ALLOWED_EXTENSIONS):
             raise HTTPException(
                 status_code=400,
-                detail=f"Geçersiz dosya türü. İzin verilenler: {', '.join(settings.ALLOWED_EXTENSIONS)}"
+                detail=f"Geçersiz dosya türü. İzin verilenler: {', '.join(ALLOWED_EXTENSIONS)}"
             )
 
         # Create unique filename
@@ -103,10 +108,10 @@ async def upload_template_file(
     """
     try:
         # Validate file
-        if not validate_file(file, settings.ALLOWED_TEMPLATE_EXTENSIONS):
+        if not validate_file(file, ALLOWED_TEMPLATE_EXTENSIONS):
             raise HTTPException(
                 status_code=400,
-                detail=f"Geçersiz şablon dosyası. İzin verilenler: {', '.join(settings.ALLOWED_TEMPLATE_EXTENSIONS)}"
+                detail=f"Geçersiz şablon dosyası. İzin verilenler: {', '.join(ALLOWED_TEMPLATE_EXTENSIONS)}"
             )
 
         # Save file
@@ -170,59 +175,64 @@ async def upload_batch_files(
         List of uploaded file IDs
     """
     try:
-        if len(files) > settings.MAX_BATCH_SIZE:
+        if len(files) > MAX_BATCH_SIZE:
             raise HTTPException(
                 status_code=400,
-                detail=f"Maksimum {settings.MAX_BATCH_SIZE} dosya yüklenebilir"
+                detail=f"Maksimum {MAX_BATCH_SIZE} dosya yüklenebilir"
             )
 
         uploaded_docs = []
-        audit_logger = AuditLogger(db)
+        audit_events = []
         template_id_value = int(template_id) if template_id is not None else None
 
-        for file in files:
-            # Validate file
-            if not validate_file(file, settings.ALLOWED_EXTENSIONS):
-                logger.warning(f"Geçersiz dosya atlandı: {file.filename}")
-                continue
-
-            # Save file
-            timestamp = Path(file.filename).stem
-            file_ext = Path(file.filename).suffix
-            unique_filename = f"batch_{timestamp}_{file.filename}"
-
-            file_path = settings.UPLOAD_DIR / unique_filename
-
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-
-            # Create document record
-            document = Document(
-                filename=file.filename,
-                file_path=str(file_path),
-                template_id=template_id_value,
-                status="pending"
-            )
-
-            db.add(document)
-            db.commit()
-            db.refresh(document)
-
-            audit_logger.log_event(
-                "upload",
-                "document",
-                document.id,
-                metadata={
-                    "filename": file.filename,
-                    "destination": "batch",
-                    "template_id": template_id_value,
-                },
-            )
-
-            uploaded_docs.append({
-                "document_id": document.id,
-                "filename": file.filename
-            })
+        try:
+            for file in files:
+                # Validate file
+                if not validate_file(file, ALLOWED_EXTENSIONS):
+                    logger.warning(f"Geçersiz dosya atlandı: {file.filename}")
+                    continue
+
+                # Save file
+                timestamp = Path(file.filename).stem
+                file_ext = Path(file.filename).suffix
+                unique_filename = f"batch_{timestamp}_{file.filename}"
+
+                file_path = settings.UPLOAD_DIR / unique_filename
+
+                with open(file_path, "wb") as buffer:
+                    shutil.copyfileobj(file.file, buffer)
+
+                # Create document record
+                document = Document(
+                    filename=file.filename,
+                    file_path=str(file_path),
+                    template_id=template_id_value,
+                    status="pending"
+                )
+
+                db.add(document)
+                db.commit()
+                db.refresh(document)
+
+                audit_events.append({
+                    "event_type": "upload",
+                    "resource_type": "document",
+                    "resource_id": document.id,
+                    "metadata": {
+                        "filename": file.filename,
+                        "destination": "batch",
+                        "template_id": template_id_value,
+                    },
+                })
+
+                uploaded_docs.append({
+                    "document_id": document.id,
+                    "filename": file.filename
+                })
+        finally:
+            # Audit entries for every stored document are written in one
+            # commit, even if a later file in the batch fails.
+            AuditLogger(db).log_events(audit_events)
 
         logger.info(f"Toplu yükleme: {len(uploaded_docs)} dosya")
 
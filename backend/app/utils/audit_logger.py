@@ -3,7 +3,8 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, Optional
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
 
 from sqlalchemy.orm import Session
 
@@ -70,6 +71,42 @@ class AuditLogger:
                     logger.debug("Audit log rollback başarısız", exc_info=True)
             return None
 
+    def log_events(self, events: Iterable[Dict[str, Any]]) -> List[AuditLog]:
+        """Persist several entries with one commit and a shared timestamp.
+
+        Each event accepts the same keys as :meth:`log_event`.
+        """
+
+        created_at = datetime.utcnow()
+        entries = [
+            AuditLog(
+                event_type=event["event_type"],
+                resource_type=event["resource_type"],
+                resource_id=event.get("resource_id"),
+                user_id=event.get("user_id"),
+                description=event.get("description"),
+                payload=event.get("metadata"),
+                ip_address=event.get("ip_address"),
+                created_at=created_at,
+            )
+            for event in events
+        ]
+        if not entries:
+            return []
+
+        try:
+            self._db.add_all(entries)
+            self._db.commit()
+            logger.debug("Audit log kaydedildi: %d kayıt", len(entries))
+            return entries
+        except Exception as exc:  # pragma: no cover - defensive fallback
+            logger.error("Audit log kaydedilemedi: %s", exc)
+            try:
+                self._db.rollback()
+            except Exception:  # pragma: no cover - defensive
+                logger.debug("Audit log rollback başarısız", exc_info=True)
+            return []
+
 
 __all__ = ["AuditLogger"]
 
@@ -0,0 +1,245 @@
+"""Schema reflection helpers shared by the Alembic revision scripts."""
+
+from __future__ import annotations
+
+import weakref
+from typing import Any, Dict, FrozenSet, MutableMapping, Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.engine.reflection import Inspector
+from sqlalchemy.schema import CreateColumn
+
+
+_TABLES_KEY = "__tables__"
+
+_INDEXES_KEY = "__indexes__:{}"
+_UNIQUES_KEY = "__uniques__:{}"
+
+# Dialects that accept several ADD COLUMN clauses in one ALTER TABLE.
+MULTI_ADD_COLUMN_DIALECTS = {"postgresql", "mysql", "mariadb"}
+
+# Reflection results per migration connection. Entries disappear together with
+# the connection, so separate Alembic runs never see each other's schema.
+_REFLECTION_CACHE: MutableMapping[Connection, Dict[str, FrozenSet[str]]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _connection_cache() -> Dict[str, FrozenSet[str]]:
+    return _REFLECTION_CACHE.setdefault(op.get_bind(), {})
+
+
+def _inspector() -> Inspector:
+    """Return the run-wide Inspector that env.py shares, or a fresh one."""
+
+    inspector = op.get_context().config.attributes.get("inspector")
+    if inspector is None or inspector.bind is not op.get_bind():
+        inspector = inspect(op.get_bind())
+    return inspector
+
+
+def reset_reflection_cache(table_name: str | None = None) -> None:
+    """Forget cached reflection for ``table_name`` (or everything)."""
+
+    shared = op.get_context().config.attributes.get("inspector")
+    if shared is not None:
+        shared.clear_cache()
+
+    cache = _REFLECTION_CACHE.get(op.get_bind())
+    if cache is None:
+        return
+
+    if table_name is None:
+        cache.clear()
+        return
+
+    cache.pop(table_name, None)
+    cache.pop(_INDEXES_KEY.format(table_name), None)
+    cache.pop(_UNIQUES_KEY.format(table_name), None)
+    cache.pop(_TABLES_KEY, None)
+
+
+def existing_tables() -> FrozenSet[str]:
+    """Return table names, reflecting at most once per connection."""
+
+    cache = _connection_cache()
+    tables = cache.get(_TABLES_KEY)
+    if tables is None:
+        tables = frozenset(_inspector().get_table_names())
+        cache[_TABLES_KEY] = tables
+    return tables
+
+
+def existing_columns(table_name: str) -> FrozenSet[str]:
+    """Return column names of ``table_name``, reflecting at most once."""
+
+    cache = _connection_cache()
+    columns = cache.get(table_name)
+    if columns is None:
+        columns = frozenset(
+            column["name"]
+            for column in _inspector().get_columns(table_name)
+        )
+        cache[table_name] = columns
+    return columns
+
+
+def existing_indexes(table_name: str) -> FrozenSet[str]:
+    """Return index names defined on ``table_name``, reflecting at most once."""
+
+    cache = _connection_cache()
+    key = _INDEXES_KEY.format(table_name)
+    indexes = cache.get(key)
+    if indexes is None:
+        indexes = frozenset(
+            index["name"]
+            for index in _inspector().get_indexes(table_name)
+            if index.get("name")
+        )
+        cache[key] = indexes
+    return indexes
+
+
+def existing_unique_constraints(table_name: str) -> FrozenSet[str]:
+    """Return named unique constraints on ``table_name``, reflecting once."""
+
+    cache = _connection_cache()
+    key = _UNIQUES_KEY.format(table_name)
+    constraints = cache.get(key)
+    if constraints is None:
+        constraints = frozenset(
+            constraint["name"]
+            for constraint in _inspector().get_unique_constraints(table_name)
+            if constraint.get("name")
+        )
+        cache[key] = constraints
+    return constraints
+
+
+def report_progress(revision: str, rows_done: int) -> None:
+    """Forward data-migration progress to the in-process runner, if any."""
+
+    callback = op.get_context().config.attributes.get("progress_callback")
+    if callback is not None:
+        callback(revision, rows_done)
+
+
+def add_column(table_name: str, column: Any, **kwargs: Any) -> None:
+    op.add_column(table_name, column, **kwargs)
+    reset_reflection_cache(table_name)
+
+
+def add_columns(table_name: str, columns: Sequence[sa.Column]) -> None:
+    """Add ``columns`` to ``table_name`` under a single table lock/rebuild."""
+
+    if not columns:
+        return
+
+    dialect = op.get_context().dialect
+    if dialect.name in MULTI_ADD_COLUMN_DIALECTS:
+        # Bind the columns to a throwaway table so the compiler sees them in
+        # the same context as op.add_column would.
+        sa.Table(table_name, sa.MetaData(), *columns)
+        clauses = ", ".join(
+            f"ADD COLUMN {CreateColumn(column).compile(dialect=dialect)}"
+            for column in columns
+        )
+        quoted = dialect.identifier_preparer.quote(table_name)
+        op.execute(f"ALTER TABLE {quoted} {clauses}")
+    else:
+        with op.batch_alter_table(table_name) as batch_op:
+            for column in columns:
+                batch_op.add_column(column)
+
+    reset_reflection_cache(table_name)
+
+
+def create_index(
+    index_name: str,
+    table_name: str,
+    columns: Sequence[str],
+    *,
+    concurrently: bool = False,
+    **kwargs: Any,
+) -> None:
+    """Create an index unless it exists.
+
+    With ``concurrently=True`` PostgreSQL builds it outside the migration
+    transaction so writes to an already populated table are not blocked.
+    The autocommit block also commits everything the run has done so far;
+    env.py runs the whole revision chain in one transaction, so only use it
+    with ``transaction_per_migration`` or when losing atomicity is acceptable.
+    Freshly created tables are empty and should use the default.
+    """
+
+    if index_name in existing_indexes(table_name):
+        return
+
+    if concurrently and op.get_context().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(
+                index_name,
+                table_name,
+                columns,
+                postgresql_concurrently=True,
+                **kwargs,
+            )
+    else:
+        op.create_index(index_name, table_name, columns, **kwargs)
+
+    reset_reflection_cache(table_name)
+
+
+def drop_index(
+    index_name: str, table_name: str, *, concurrently: bool = False
+) -> None:
+    if index_name not in existing_indexes(table_name):
+        return
+
+    if concurrently and op.get_context().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                index_name, table_name=table_name, postgresql_concurrently=True
+            )
+    else:
+        op.drop_index(index_name, table_name=table_name)
+
+    reset_reflection_cache(table_name)
+
+
+def drop_column(table_name: str, column_name: str, **kwargs: Any) -> None:
+    op.drop_column(table_name, column_name, **kwargs)
+    reset_reflection_cache(table_name)
+
+
+def create_table(table_name: str, *elements: Any, **kwargs: Any) -> Any:
+    """Create a table together with the ``sa.Index`` objects declared inline."""
+
+    table = op.create_table(table_name, *elements, **kwargs)
+    reset_reflection_cache(table_name)
+    return table
+
+
+def drop_table(table_name: str, **kwargs: Any) -> None:
+    op.drop_table(table_name, **kwargs)
+    reset_reflection_cache(table_name)
+
+
+__all__ = [
+    "add_column",
+    "add_columns",
+    "create_index",
+    "create_table",
+    "drop_column",
+    "drop_index",
+    "drop_table",
+    "existing_columns",
+    "existing_indexes",
+    "existing_unique_constraints",
+    "report_progress",
+    "existing_tables",
+    "reset_reflection_cache",
+]
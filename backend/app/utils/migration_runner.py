@@ -0,0 +1,163 @@
+"""Run Alembic migrations from inside the application process."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import text
+
+from app.database import engine
+
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+ALEMBIC_INI = BASE_DIR / "alembic.ini"
+
+# Arbitrary but stable key shared by every runner on the same PostgreSQL
+# database, so only one of several workers applies migrations.
+ADVISORY_LOCK_KEY = 0x64696A6974616C
+
+_status_lock = threading.Lock()
+_run_lock = threading.Lock()
+_status: Dict[str, Any] = {"state": "idle"}
+
+
+def get_migration_status() -> Dict[str, Any]:
+    """Return a snapshot of the current migration run."""
+
+    with _status_lock:
+        return dict(_status)
+
+
+def _update_status(**changes: Any) -> None:
+    with _status_lock:
+        _status.update(changes)
+
+
+def _record_progress(revision: str, rows_done: int) -> None:
+    _update_status(revision=revision, rows_done=rows_done)
+
+
+def _record_revision(*, step: Any, **_: Any) -> None:
+    revisions = getattr(step, "up_revision_ids", None) or ()
+    _update_status(revision=", ".join(revisions) or None, rows_done=0)
+
+
+@contextmanager
+def _migration_lock(wait: bool = False) -> Iterator[bool]:
+    """Yield ``True`` when this process may run migrations.
+
+    With ``wait`` the lock is awaited instead of skipped, so the caller only
+    proceeds once any concurrent run has finished.
+    """
+
+    if not _run_lock.acquire(blocking=wait):
+        yield False
+        return
+
+    try:
+        if engine.dialect.name != "postgresql":
+            yield True
+            return
+
+        with engine.connect() as connection:
+            if wait:
+                connection.execute(
+                    text("SELECT pg_advisory_lock(:key)"),
+                    {"key": ADVISORY_LOCK_KEY},
+                )
+                acquired = True
+            else:
+                acquired = connection.execute(
+                    text("SELECT pg_try_advisory_lock(:key)"),
+                    {"key": ADVISORY_LOCK_KEY},
+                ).scalar()
+            try:
+                yield bool(acquired)
+            finally:
+                if acquired:
+                    connection.execute(
+                        text("SELECT pg_advisory_unlock(:key)"),
+                        {"key": ADVISORY_LOCK_KEY},
+                    )
+    finally:
+        _run_lock.release()
+
+
+def run_migrations(target: str = "head", wait: bool = False) -> bool:
+    """Upgrade the database to ``target``; return ``False`` on failure.
+
+    Pass ``wait=True`` when the caller must not continue on a half-migrated
+    schema: instead of skipping while another worker holds the lock, the run
+    blocks until it is released and then upgrades (a no-op if that worker
+    already reached ``target``).
+    """
+
+    from alembic import command
+    from alembic.config import Config
+
+    with _migration_lock(wait) as acquired:
+        if not acquired:
+            logger.info("Migrasyonlar başka bir süreç tarafından çalıştırılıyor")
+            _update_status(state="skipped")
+            return True
+
+        _update_status(
+            state="running",
+            target=target,
+            revision=None,
+            rows_done=0,
+            started_at=datetime.utcnow().isoformat(),
+            finished_at=None,
+            error=None,
+        )
+
+        config = Config(str(ALEMBIC_INI))
+        config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+        config.attributes["configure_logger"] = False
+        config.attributes["progress_callback"] = _record_progress
+        config.attributes["on_version_apply"] = _record_revision
+
+        try:
+            command.upgrade(config, target)
+        except Exception as exc:
+            logger.exception("Migrasyon başarısız: %s", exc)
+            _update_status(
+                state="failed",
+                error=str(exc),
+                finished_at=datetime.utcnow().isoformat(),
+            )
+            return False
+
+        _update_status(state="completed", finished_at=datetime.utcnow().isoformat())
+        logger.info("Migrasyonlar tamamlandı (%s)", target)
+        return True
+
+
+def start_background_migrations(target: str = "head") -> Optional[threading.Thread]:
+    """Run :func:`run_migrations` on a daemon thread and return it."""
+
+    if get_migration_status().get("state") == "running":
+        return None
+
+    thread = threading.Thread(
+        target=run_migrations,
+        args=(target,),
+        name="alembic-migrations",
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+__all__ = [
+    "get_migration_status",
+    "run_migrations",
+    "start_background_migrations",
+]
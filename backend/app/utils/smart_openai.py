@@ -1,13 +1,198 @@
 """Utility helpers for interacting with OpenAI responses and reasoning models."""
 from __future__ import annotations
 
+import atexit
 import inspect
 import json
 import logging
-from typing import Any, Dict, Iterable, List, Optional, Sequence
+import threading
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speed-up
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Clients keyed by (client class, api key). Each client owns an HTTP connection
+# pool, so sharing it keeps TLS sessions alive across mapper/interpreter objects.
+_CLIENT_CACHE: Dict[Tuple[Any, str], Any] = {}
+_CLIENT_CACHE_LOCK = threading.Lock()
+
+
+class OpenAISDK(NamedTuple):
+    """The pieces of the ``openai`` package the core modules rely on."""
+
+    module: Any
+    OpenAI: Any
+    AsyncOpenAI: Any
+    AuthenticationError: Type[BaseException]
+    OpenAIError: Type[BaseException]
+
+
+@lru_cache(maxsize=None)
+def load_openai_sdk() -> OpenAISDK:
+    """Import the OpenAI SDK on first use and remember the result.
+
+    Importing ``openai`` pulls in httpx and pydantic models, so modules only
+    call this once they actually hold an API key. ``module`` is ``None`` when
+    the library is missing; ``OpenAI``/``AsyncOpenAI`` are ``None`` on the
+    legacy (<1.0) SDK, whose errors live in ``openai.error``.
+    """
+
+    try:
+        import openai  # type: ignore
+    except ImportError:  # pragma: no cover - library not available
+        return OpenAISDK(None, None, None, Exception, Exception)
+
+    client_cls = getattr(openai, "OpenAI", None)
+    if client_cls is not None:
+        return OpenAISDK(
+            openai,
+            client_cls,
+            getattr(openai, "AsyncOpenAI", None),
+            openai.AuthenticationError,
+            openai.OpenAIError,
+        )
+
+    try:  # pragma: no cover - legacy SDK
+        from openai.error import AuthenticationError, OpenAIError  # type: ignore
+    except ImportError:  # pragma: no cover - final fallback
+        AuthenticationError = OpenAIError = Exception  # type: ignore
+    return OpenAISDK(openai, None, None, AuthenticationError, OpenAIError)
+
+
+# Connection pool shared by every OpenAI client of one kind (sync/async), so
+# concurrent requests reuse warm keep-alive connections instead of queueing
+# behind the SDK's per-client default pool.
+HTTP_MAX_CONNECTIONS = 200
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 100
+HTTP_KEEPALIVE_EXPIRY_SECONDS = 300.0
+HTTP_CONNECT_TIMEOUT_SECONDS = 5.0
+_HTTP_CLIENTS: Dict[bool, Any] = {}
+
+
+def _shared_http_client(is_async: bool) -> Any:
+    """Return the pooled httpx client handed to OpenAI clients, or ``None``."""
+
+    http_client = _HTTP_CLIENTS.get(is_async)
+    if http_client is not None:
+        return http_client
+
+    sdk = load_openai_sdk()
+    try:
+        import httpx
+    except ImportError:  # pragma: no cover - httpx ships with the modern SDK
+        return None
+    try:
+        import h2  # noqa: F401
+    except ImportError:  # pragma: no cover - HTTP/2 is an optional extra
+        http2 = False
+    else:  # pragma: no cover - depends on the h2 package
+        http2 = True
+
+    if is_async:
+        client_cls = getattr(sdk.module, "DefaultAsyncHttpxClient", httpx.AsyncClient)
+    else:
+        client_cls = getattr(sdk.module, "DefaultHttpxClient", httpx.Client)
+    http_client = client_cls(
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        # The SDK passes its own per-request timeout; only connect is ours.
+        timeout=httpx.Timeout(600.0, connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+        http2=http2,
+    )
+    if not is_async:
+        atexit.register(http_client.close)
+    _HTTP_CLIENTS[is_async] = http_client
+    return http_client
+
+
+def _http_client_kwargs(factory: Callable[..., Any]) -> Dict[str, Any]:
+    """``http_client=`` for the SDK's client classes, nothing for other factories."""
+
+    sdk = load_openai_sdk()
+    if factory is sdk.OpenAI and factory is not None:
+        http_client = _shared_http_client(False)
+    elif factory is sdk.AsyncOpenAI and factory is not None:
+        http_client = _shared_http_client(True)
+    else:
+        return {}
+    return {"http_client": http_client} if http_client is not None else {}
+
+
+def loads_json(text: str) -> Any:
+    """Parse model output with orjson when available, else the stdlib.
+
+    The stdlib also accepts what orjson rejects (NaN, huge integers) and
+    raises the ``json.JSONDecodeError`` callers already handle.
+    """
+
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
+
+
+def configure_legacy_openai(module: Any, api_key: str) -> None:
+    """Set the key on a pre-1.0 ``openai`` module and give it a pooled session.
+
+    Without ``requestssession`` the legacy SDK opens a new session, and with
+    it a new TLS connection, for every request.
+    """
+
+    module.api_key = api_key
+    if getattr(module, "requestssession", None) is not None:
+        return
+    try:
+        import requests
+        from requests.adapters import HTTPAdapter
+    except ImportError:  # pragma: no cover - requests ships with the legacy SDK
+        return
+
+    session = requests.Session()
+    session.mount(
+        "https://",
+        HTTPAdapter(
+            pool_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            pool_maxsize=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        ),
+    )
+    atexit.register(session.close)
+    module.requestssession = session
+
+
+def get_openai_client(api_key: str, factory: Callable[..., Any]) -> Any:
+    """Return the shared client built by ``factory(api_key=api_key)``."""
+
+    key = (factory, api_key)
+    client = _CLIENT_CACHE.get(key)
+    if client is None:
+        with _CLIENT_CACHE_LOCK:
+            client = _CLIENT_CACHE.get(key)
+            if client is None:
+                client = factory(api_key=api_key, **_http_client_kwargs(factory))
+                _CLIENT_CACHE[key] = client
+    return client
+
 
 def _method_accepts_keyword(method: Any, keyword: str) -> bool:
     """Return ``True`` if the callable ``method`` accepts ``keyword``.
@@ -226,8 +411,7 @@ def _normalize_messages_for_responses(
     return [_normalize_message_for_responses(message) for message in messages]
 
 
-def _call_reasoning_model(
-    client: Any,
+def build_reasoning_request(
     *,
     model: str,
     messages: Sequence[Dict[str, Any]],
@@ -235,8 +419,8 @@ def _call_reasoning_model(
     temperature: Optional[float] = None,
     reasoning_effort: str = "medium",
     extra_kwargs: Optional[Dict[str, Any]] = None,
-) -> Any:
-    """Invoke OpenAI Responses API for reasoning models with consistent defaults."""
+) -> Dict[str, Any]:
+    """Return the Responses API request body used for reasoning models."""
 
     request_kwargs: Dict[str, Any] = {
         "model": model,
@@ -277,6 +461,30 @@ def _call_reasoning_model(
         if filtered_kwargs:
             request_kwargs.update(filtered_kwargs)
 
+    return request_kwargs
+
+
+def _call_reasoning_model(
+    client: Any,
+    *,
+    model: str,
+    messages: Sequence[Dict[str, Any]],
+    response_format: Optional[Dict[str, Any]] = None,
+    temperature: Optional[float] = None,
+    reasoning_effort: str = "medium",
+    extra_kwargs: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """Invoke OpenAI Responses API for reasoning models with consistent defaults."""
+
+    request_kwargs = build_reasoning_request(
+        model=model,
+        messages=messages,
+        response_format=response_format,
+        temperature=temperature,
+        reasoning_effort=reasoning_effort,
+        extra_kwargs=extra_kwargs,
+    )
+
     logger.debug(
         "Calling reasoning model: model=%s, has_response_format=%s", model, bool(response_format)
     )
@@ -308,6 +516,12 @@ def call_reasoning_model(
 
 
 __all__ = [
+    "build_reasoning_request",
     "call_reasoning_model",
+    "configure_legacy_openai",
     "extract_reasoning_response_text",
+    "get_openai_client",
+    "load_openai_sdk",
+    "loads_json",
+    "OpenAISDK",
 ]
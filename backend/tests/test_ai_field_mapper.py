@@ -1,14 +1,51 @@
 # -*- coding: utf-8 -*-
+import json
+import logging
 from pathlib import Path
 import sys
+from types import SimpleNamespace
+
+import pytest
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from app.config import settings
 from app.core.ai_field_mapper import AIFieldMapper
 
 
+class _StubChatClient:
+    """Stand-in for the OpenAI client; tests plug in ``create``."""
+
+    def __init__(self):
+        self.create = None
+        self.chat = SimpleNamespace(completions=self)
+
+
+def _mapping_content(value, confidence=0.9):
+    return json.dumps({
+        'mappings': {'invoice_no': {'value': value, 'confidence': confidence, 'source': 'ocr'}},
+        'overall_confidence': confidence,
+    })
+
+
+def _mapping_response(value, confidence=0.9):
+    return {'choices': [{'message': {'content': _mapping_content(value, confidence)}}]}
+
+
+@pytest.fixture
+def stub_mapper():
+    """Mapper with a valid key and a stub chat client; the cache is reset around it."""
+
+    AIFieldMapper.clear_cache()
+    mapper = AIFieldMapper(api_key="", model="gpt-4o")
+    mapper._has_valid_api_key = True
+    mapper._client = _StubChatClient()
+    yield mapper
+    AIFieldMapper.clear_cache()
+
+
 def test_build_mapping_prompt_includes_field_metadata():
     mapper = AIFieldMapper(api_key="")
 
@@ -25,3 +62,241 @@ def test_build_mapping_prompt_includes_field_metadata():
 
     assert '"metadata"' in prompt
     assert 'Toplam tutarı yalnızca fatura metninden çıkar.' in prompt
+
+
+def test_map_fields_batch_submits_one_job_and_parses_results():
+    submitted = {}
+
+    class StubFiles:
+        def create(self, file, purpose):
+            submitted['lines'] = file[1].decode('utf-8').splitlines()
+            return SimpleNamespace(id='file-in')
+
+        def content(self, file_id):
+            rows = []
+            for line in submitted['lines']:
+                custom_id = json.loads(line)['custom_id']
+                content = _mapping_content(f'F-{custom_id}')
+                rows.append(json.dumps({
+                    'custom_id': custom_id,
+                    'response': {
+                        'status_code': 200,
+                        'body': {'choices': [{'message': {'content': content}}]},
+                    },
+                }))
+            return SimpleNamespace(text='\n'.join(reversed(rows)))
+
+    class StubBatches:
+        def create(self, input_file_id, endpoint, completion_window):
+            submitted['endpoint'] = endpoint
+            return SimpleNamespace(id='batch-1', status='in_progress', output_file_id=None)
+
+        def retrieve(self, batch_id):
+            return SimpleNamespace(id=batch_id, status='completed', output_file_id='file-out')
+
+    mapper = AIFieldMapper(api_key="", model="gpt-4o")
+    mapper._has_valid_api_key = True
+    mapper._client = SimpleNamespace(files=StubFiles(), batches=StubBatches())
+
+    fields = [{'field_name': 'invoice_no', 'data_type': 'text'}]
+    results = mapper.map_fields_batch(
+        [("Fatura No: F-0", fields, None, None), ("Fatura No: F-1", fields, None, None)],
+        poll_interval=0,
+    )
+
+    assert submitted['endpoint'] == '/v1/chat/completions'
+    assert len(submitted['lines']) == 2
+    assert [r['field_mappings']['invoice_no']['value'] for r in results] == ['F-0', 'F-1']
+
+
+def test_map_many_bounds_concurrency_and_keeps_order():
+    import asyncio
+
+    mapper = AIFieldMapper(api_key="")
+    active = {'now': 0, 'peak': 0}
+
+    async def fake_map_fields_async(ocr_text, template_fields, ocr_data=None, field_hints=None):
+        active['now'] += 1
+        active['peak'] = max(active['peak'], active['now'])
+        await asyncio.sleep(0)
+        active['now'] -= 1
+        return {'text': ocr_text}
+
+    mapper.map_fields_async = fake_map_fields_async
+    items = [(f"doc-{index}", [], None, None) for index in range(6)]
+
+    results = asyncio.run(mapper.map_many(items, max_concurrency=2))
+
+    assert [result['text'] for result in results] == [f"doc-{index}" for index in range(6)]
+    assert active['peak'] == 2
+
+
+def test_map_fields_reuses_cached_result_for_identical_input(stub_mapper):
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        return _mapping_response('F-1')
+
+    stub_mapper._client.create = create
+    fields = [{'field_name': 'invoice_no', 'data_type': 'text'}]
+
+    first = stub_mapper.map_fields("Fatura No: F-1", fields)
+    first['field_mappings']['invoice_no']['value'] = 'changed by caller'
+    second = stub_mapper.map_fields("Fatura No: F-1", fields)
+    stub_mapper.map_fields("  Fatura  No:\tF-1\n\n", fields)
+    stub_mapper.map_fields("Fatura No: F-2", fields)
+
+    assert len(calls) == 2
+    assert second['field_mappings']['invoice_no']['value'] == 'F-1'
+
+
+def test_map_fields_stops_reading_stream_once_json_object_closes(stub_mapper):
+    content = _mapping_content('F-{9}')
+    pieces = [content[index:index + 7] for index in range(0, len(content), 7)]
+    consumed = []
+
+    def chunks():
+        for piece in pieces + ['\n\nextra tokens']:
+            consumed.append(piece)
+            yield SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))]
+            )
+
+    def create(**kwargs):
+        assert kwargs['stream'] is True
+        return chunks()
+
+    stub_mapper._client.create = create
+
+    result = stub_mapper.map_fields("Fatura No: F-{9}", [{'field_name': 'invoice_no', 'data_type': 'text'}])
+
+    assert result['field_mappings']['invoice_no']['value'] == 'F-{9}'
+    assert consumed == pieces
+
+
+def test_map_fields_keeps_stream_usage_for_prompt_cache_log(stub_mapper, caplog):
+    content = _mapping_content('F-7')
+    usage = SimpleNamespace(
+        prompt_tokens=2048,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=1536),
+    )
+
+    def chunks():
+        for index in range(0, len(content), 7):
+            yield SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=content[index:index + 7]))],
+                usage=None,
+            )
+        # The usage chunk arrives after the JSON object has already closed.
+        yield SimpleNamespace(choices=[], usage=usage)
+
+    def create(*, model, messages, stream=False, stream_options=None, **kwargs):
+        assert stream is True
+        assert stream_options == {'include_usage': True}
+        return chunks()
+
+    stub_mapper._client.create = create
+    stub_mapper._refresh_response_format_support()
+
+    with caplog.at_level(logging.INFO, logger='app.core.ai_field_mapper'):
+        result = stub_mapper.map_fields("Fatura No: F-7", [{'field_name': 'invoice_no', 'data_type': 'text'}])
+
+    assert result['field_mappings']['invoice_no']['value'] == 'F-7'
+    assert 'prompt_tokens=2048, cached_tokens=1536' in caplog.text
+
+
+def test_map_fields_routes_short_documents_to_light_model_first(stub_mapper, monkeypatch):
+    monkeypatch.setattr(settings, 'AI_FALLBACK_MODEL', 'gpt-4o-mini')
+    confidences = {'gpt-4o-mini': 0.2, 'gpt-4o': 0.9}
+    models = []
+
+    def create(**kwargs):
+        models.append(kwargs['model'])
+        return _mapping_response('F-1', confidences[kwargs['model']])
+
+    stub_mapper._client.create = create
+    fields = [{'field_name': 'invoice_no', 'data_type': 'text'}]
+
+    result = stub_mapper.map_fields("Fatura No: F-1", fields)
+    assert models == ['gpt-4o-mini', 'gpt-4o']
+    assert result['overall_confidence'] == 0.9
+
+    confidences['gpt-4o-mini'] = 0.8
+    models.clear()
+    stub_mapper.map_fields("Fatura No: F-2", fields)
+    assert models == ['gpt-4o-mini']
+
+
+def test_map_fields_uses_primary_model_when_light_model_is_empty(stub_mapper, monkeypatch):
+    monkeypatch.setattr(settings, 'AI_FALLBACK_MODEL', '')
+    models = []
+
+    def create(**kwargs):
+        models.append(kwargs['model'])
+        return _mapping_response('F-1', 0.2)
+
+    stub_mapper._client.create = create
+
+    stub_mapper.map_fields("Fatura No: F-1", [{'field_name': 'invoice_no', 'data_type': 'text'}])
+    assert models == ['gpt-4o']
+
+
+def test_json_mode_client_parses_response_directly(stub_mapper):
+    def create(*, model, messages, response_format=None, **kwargs):
+        raise AssertionError("not called")
+
+    fields = [{'field_name': 'invoice_no', 'data_type': 'text'}]
+    fenced = '```json\n{"mappings": {}, "overall_confidence": 0.4}\n```'
+    assert stub_mapper._provider_guarantees_json is False
+    assert stub_mapper._parse_ai_response(fenced, fields)['overall_confidence'] == 0.4
+
+    stub_mapper._client.create = create
+    stub_mapper._refresh_response_format_support()
+    assert stub_mapper._provider_guarantees_json is True
+
+    result = stub_mapper._parse_ai_response(
+        '{"mappings": {"invoice_no": {"value": "F-1", "confidence": 0.9}}}', fields
+    )
+    assert result['field_mappings']['invoice_no']['value'] == 'F-1'
+
+
+def test_map_fields_skips_model_when_regex_evidence_is_unambiguous(stub_mapper):
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        return _mapping_response('F-1')
+
+    stub_mapper._client.create = create
+    fields = [{'field_name': 'invoice_no', 'data_type': 'text', 'regex_hint': r'F-\d+'}]
+    prepare = stub_mapper._prepare_mapping_messages
+
+    def fail_prepare(*args, **kwargs):
+        raise AssertionError("prompt built although the model is skipped")
+
+    stub_mapper._prepare_mapping_messages = fail_prepare
+    result = stub_mapper.map_fields("Fatura No: F-7", fields)
+    assert calls == []
+    assert result['field_mappings']['invoice_no']['value'] == 'F-7'
+
+    stub_mapper._prepare_mapping_messages = prepare
+    stub_mapper.map_fields("Fatura No: F-7, iade F-8", fields)
+    assert len(calls) == 1
+
+    # A single hit that is not shaped like the field's data type still goes
+    # to the model.
+    date_fields = [{'field_name': 'invoice_no', 'data_type': 'date', 'regex_hint': r'F-\d+'}]
+    stub_mapper.map_fields("Fatura No: F-7", date_fields)
+    assert len(calls) == 2
+
+
+def test_request_options_size_completion_budget_to_template():
+    mapper = AIFieldMapper(api_key="", model="gpt-4o", context_window=2000)
+
+    assert mapper._request_options()["max_completion_tokens"] == 2000
+    assert mapper._request_options(field_count=1)["max_completion_tokens"] == 280
+    assert mapper._request_options(field_count=50)["max_completion_tokens"] == 2000
+
+    reasoning = AIFieldMapper(api_key="", model="gpt-5", context_window=4000)
+    assert reasoning._request_options(field_count=1)["max_completion_tokens"] == 4000
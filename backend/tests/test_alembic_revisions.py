@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import ast
+from pathlib import Path
+
+VERSIONS_DIR = Path(__file__).resolve().parents[1] / "alembic" / "versions"
+
+
+def _module_constants(path: Path) -> dict:
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    constants = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    constants[target.id] = node.value.value
+    return constants
+
+
+def test_alembic_revision_ids_are_unique_and_linked():
+    revisions = {}
+    for path in sorted(VERSIONS_DIR.glob("*.py")):
+        if path.name.startswith("__init__"):
+            continue
+        constants = _module_constants(path)
+        revision = constants["revision"]
+        assert revision not in revisions, (
+            f"{path.name} reuses revision {revision} from {revisions[revision][0]}"
+        )
+        revisions[revision] = (path.name, constants.get("down_revision"))
+
+    down_revisions = {down for _, down in revisions.values()}
+    assert None in down_revisions
+    assert down_revisions - {None} <= set(revisions)
+
+    heads = set(revisions) - down_revisions
+    assert len(heads) == 1
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from pathlib import Path
+import sys
+
+from sqlalchemy import create_engine
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app import database
+
+
+def test_init_db_checks_file_backed_sqlite_database(tmp_path, monkeypatch):
+    db_file = tmp_path / "digitalization.db"
+    monkeypatch.setattr(database, "engine", create_engine(f"sqlite:///{db_file}"))
+
+    assert database.init_db() is False
+
+    db_file.touch()
+    assert database.init_db() is True
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import asyncio
+from pathlib import Path
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.utils import migration_runner
+
+
+class _RecordingConnection:
+    def __init__(self, statements):
+        self.statements = statements
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+        # Another worker holds the lock, so the non-blocking attempt fails.
+        return SimpleNamespace(scalar=lambda: False)
+
+
+def _postgres_engine(statements):
+    return SimpleNamespace(
+        dialect=SimpleNamespace(name="postgresql"),
+        connect=lambda: _RecordingConnection(statements),
+    )
+
+
+def test_migration_lock_skips_when_not_waiting(monkeypatch):
+    statements = []
+    monkeypatch.setattr(migration_runner, "engine", _postgres_engine(statements))
+
+    with migration_runner._migration_lock() as acquired:
+        assert acquired is False
+
+    assert statements == ["SELECT pg_try_advisory_lock(:key)"]
+
+
+def test_migration_lock_blocks_on_advisory_lock_when_waiting(monkeypatch):
+    statements = []
+    monkeypatch.setattr(migration_runner, "engine", _postgres_engine(statements))
+
+    with migration_runner._migration_lock(wait=True) as acquired:
+        assert acquired is True
+
+    assert statements == [
+        "SELECT pg_advisory_lock(:key)",
+        "SELECT pg_advisory_unlock(:key)",
+    ]
+
+
+def test_sync_startup_aborts_when_migrations_fail(monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(main.settings, "MIGRATION_MODE", "sync")
+    monkeypatch.setattr(main, "configure_tesseract", lambda: None)
+    monkeypatch.setattr(main, "run_migrations", lambda **kwargs: False)
+    monkeypatch.setattr(
+        main, "init_db", lambda: pytest.fail("init_db ran after a failed migration")
+    )
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(main.startup_event())
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+import importlib.util
+import json
+from pathlib import Path
+import sys
+from types import SimpleNamespace
+
+import pytest
+import sqlalchemy as sa
+from alembic.config import Config
+from alembic.operations import Operations
+from alembic.runtime.environment import EnvironmentContext
+from alembic.script import ScriptDirectory
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+MIGRATION_PATH = (
+    ROOT / "alembic" / "versions" / "b9da4b693915_add_template_field_processing_metadata.py"
+)
+
+STALE_FIELD = {"field_name": "invoice_no"}
+MIGRATED_FIELD = {
+    "field_name": "invoice_no",
+    "processing_mode": "auto",
+    "llm_tier": "standard",
+    "handwriting_threshold": None,
+    "auto_detected_handwriting": False,
+}
+
+
+@pytest.fixture
+def migration(monkeypatch):
+    spec = importlib.util.spec_from_file_location("processing_metadata_migration", MIGRATION_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    # Small pages so the fallback has to walk several of them.
+    monkeypatch.setattr(module, "BACKFILL_BATCH_SIZE", 2)
+    return module
+
+
+@pytest.fixture
+def connection():
+    engine = sa.create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(sa.text(
+            "CREATE TABLE templates (id INTEGER PRIMARY KEY, target_fields JSON)"
+        ))
+        connection.execute(sa.text(
+            "CREATE TABLE template_fields ("
+            "id INTEGER PRIMARY KEY, template_id INTEGER, field_name VARCHAR(255))"
+        ))
+        connection.execute(
+            sa.text("INSERT INTO templates (id, target_fields) VALUES (:id, :fields)"),
+            [
+                {"id": 1, "fields": json.dumps([STALE_FIELD])},
+                {"id": 2, "fields": json.dumps([MIGRATED_FIELD])},
+                {"id": 3, "fields": json.dumps([STALE_FIELD, "not-a-field"])},
+                {"id": 4, "fields": "not json"},
+                {"id": 5, "fields": json.dumps([STALE_FIELD])},
+            ],
+        )
+        yield connection
+
+
+def _target_fields(connection):
+    rows = connection.execute(
+        sa.text("SELECT id, target_fields FROM templates ORDER BY id")
+    ).fetchall()
+    return {template_id: raw for template_id, raw in rows}
+
+
+def _assert_backfilled(connection):
+    fields = _target_fields(connection)
+    assert json.loads(fields[1]) == [MIGRATED_FIELD]
+    assert json.loads(fields[2]) == [MIGRATED_FIELD]
+    assert json.loads(fields[3]) == [MIGRATED_FIELD, "not-a-field"]
+    assert fields[4] == "not json"
+    assert json.loads(fields[5]) == [MIGRATED_FIELD]
+
+
+def test_upgrade_backfills_target_fields_on_sqlite(migration, connection):
+    progress = []
+    config = Config()
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    config.attributes["progress_callback"] = lambda revision, rows: progress.append(rows)
+    environment = EnvironmentContext(config, ScriptDirectory.from_config(config))
+    environment.configure(connection=connection)
+
+    with Operations.context(environment.get_context()):
+        migration.upgrade()
+
+    _assert_backfilled(connection)
+    columns = {column["name"] for column in sa.inspect(connection).get_columns("template_fields")}
+    assert set(migration.PROCESSING_KEYS) <= columns
+    # Only the three stale templates come back from the SQLite query.
+    assert progress == [2, 3]
+
+
+class _BufferedOnlyBind:
+    """Report a non-SQLite dialect and fail if a SELECT is left half-read."""
+
+    def __init__(self, connection):
+        self.dialect = SimpleNamespace(name="mysql")
+        self._connection = connection
+        self._open = None
+
+    def execute(self, statement, params=None):
+        assert self._open is None, "statement issued while a SELECT is still open"
+        result = self._connection.execute(statement, params)
+        if result.returns_rows:
+            self._open = result
+            return self
+
+        return result
+
+    def fetchall(self):
+        rows, self._open = self._open.fetchall(), None
+        return rows
+
+
+def test_python_backfill_pages_generic_dialects(migration, connection, monkeypatch):
+    progress = []
+    monkeypatch.setattr(
+        migration, "report_progress", lambda revision, rows: progress.append(rows)
+    )
+
+    migration._backfill_target_fields_in_python(_BufferedOnlyBind(connection))
+
+    _assert_backfilled(connection)
+    assert progress == [2, 4, 5]
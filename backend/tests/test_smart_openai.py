@@ -10,6 +10,9 @@ if str(ROOT_DIR) not in sys.path:
 from backend.app.utils.smart_openai import (
     _normalize_messages_for_responses,
     call_reasoning_model,
+    configure_legacy_openai,
+    get_openai_client,
+    load_openai_sdk,
 )
 
 
@@ -105,3 +108,43 @@ def test_call_reasoning_model_uses_normalized_messages():
         {"role": "user", "content": [{"type": "input_text", "text": "usr"}]},
     ]
 
+
+def test_get_openai_client_reuses_client_per_key():
+    created = []
+
+    class StubClient:
+        def __init__(self, api_key):
+            created.append(api_key)
+
+    first = get_openai_client("key-a", StubClient)
+    second = get_openai_client("key-a", StubClient)
+    other = get_openai_client("key-b", StubClient)
+
+    assert first is second
+    assert other is not first
+    assert created == ["key-a", "key-b"]
+
+
+def test_load_openai_sdk_is_memoized():
+    sdk = load_openai_sdk()
+
+    assert load_openai_sdk() is sdk
+    assert issubclass(sdk.AuthenticationError, BaseException)
+    assert issubclass(sdk.OpenAIError, BaseException)
+
+
+def test_configure_legacy_openai_keeps_one_pooled_session():
+    from types import SimpleNamespace
+
+    import pytest
+
+    pytest.importorskip("requests")
+    module = SimpleNamespace(api_key=None, requestssession=None)
+
+    configure_legacy_openai(module, "sk-one")
+    session = module.requestssession
+    configure_legacy_openai(module, "sk-two")
+
+    assert module.api_key == "sk-two"
+    assert session is not None
+    assert module.requestssession is session